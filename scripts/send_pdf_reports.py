@@ -47,7 +47,7 @@ async def send_pdf_reports(session_ids: list[int], target_id: int = None):
     
     print("Importing Analytics...", flush=True)
     try:
-        from src.ai.answer_analyzer import calculate_category_scores, calibrate_scores, METRIC_NAMES_RU
+        from src.ai.answer_analyzer import calculate_category_scores, calibrate_scores, get_metric_name_ru
         print("Answer analyzer imported.", flush=True)
         from src.analytics import build_profile, get_benchmark, build_pdp
         print("Analytics imported.", flush=True)
@@ -120,8 +120,8 @@ async def send_pdf_reports(session_ids: list[int], target_id: int = None):
                     )
                     
                     profile_data = {
-                        "strengths": [METRIC_NAMES_RU.get(st, st) for st in profile.strengths],
-                        "growth_areas": [METRIC_NAMES_RU.get(ga, ga) for ga in profile.growth_areas],
+                        "strengths": [get_metric_name_ru(st) for st in profile.strengths],
+                        "growth_areas": [get_metric_name_ru(ga) for ga in profile.growth_areas],
                         "top_competencies": profile.top_competencies,
                     }
                     
@@ -178,6 +178,16 @@ METRIC_NAMES_RU = {
     "growth_orientation": "Ориентация на рост",
 }
 
+
+# Связанный метод — без поиска атрибута на каждом вызове в циклах
+_METRIC_NAME_GET = METRIC_NAMES_RU.get
+
+
+def get_metric_name_ru(metric: str) -> str:
+    """Русское название метрики (ключ как есть, если перевода нет)."""
+    return _METRIC_NAME_GET(metric, metric)
+
+
 # Группировка метрик по категориям
 METRIC_CATEGORIES = {
     "hard_skills": {
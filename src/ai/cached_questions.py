@@ -101,6 +101,16 @@ CACHED_FIRST_QUESTIONS: dict[str, dict[str, list[str]]] = {
 }
 
 
+# Плоский индекс (role, experience) -> варианты: один lookup по кортежу вместо двух .get.
+# Сам выбор не кэшируем — random.choice должен отрабатывать на каждом старте
+_FIRST_QUESTIONS_BY_KEY: dict[tuple[str, str], tuple[str, ...]] = {
+    (role, experience): tuple(questions)
+    for role, by_experience in CACHED_FIRST_QUESTIONS.items()
+    for experience, questions in by_experience.items()
+    if questions
+}
+
+
 def get_cached_first_question(role: str, experience: str) -> Optional[str]:
     """
     Возвращает случайный первый вопрос из кэша.
@@ -112,8 +122,7 @@ def get_cached_first_question(role: str, experience: str) -> Optional[str]:
     Returns:
         Случайный вопрос из кэша или None если комбинация не найдена
     """
-    role_questions = CACHED_FIRST_QUESTIONS.get(role, {})
-    questions = role_questions.get(experience, [])
+    questions = _FIRST_QUESTIONS_BY_KEY.get((role, experience))
     
     if not questions:
         return None
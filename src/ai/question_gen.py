@@ -1,7 +1,10 @@
 """
 Генератор адаптивных вопросов.
 """
+import hashlib
+import json
 import logging
+from collections import OrderedDict
 
 from src.ai.client import chat_completion
 from src.core.prompts.system import get_question_prompt
@@ -9,6 +12,23 @@ from src.core.prompts.questions import get_questions, get_random_icebreaker
 
 logger = logging.getLogger(__name__)
 
+# Exact-match кэш: хэш промпта -> вопрос. Срабатывает, когда тот же шаг
+# генерируется повторно (повтор шага после ошибки — история при этом
+# обрезается до текущего вопроса, поэтому промпт тот же; повторный старт)
+QUESTION_CACHE_SIZE = 512
+_question_cache: OrderedDict[str, str] = OrderedDict()
+
+
+def _prompt_key(messages: list[dict]) -> str:
+    """Ключ кэша — SHA-256 от промпта целиком."""
+    payload = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def clear_question_cache() -> None:
+    """Сбросить кэш вопросов."""
+    _question_cache.clear()
+
 
 async def generate_question(
     role: str,
@@ -46,6 +66,13 @@ async def generate_question(
             analysis_history=analysis_history,
         )
         
+        cache_key = _prompt_key(messages)
+        cached = _question_cache.get(cache_key)
+        if cached is not None:
+            _question_cache.move_to_end(cache_key)
+            logger.info(f"Question {question_number} for {role} served from cache")
+            return cached
+        
         question = await chat_completion(
             messages=messages,
             temperature=0.8,  # Немного креативности
@@ -56,14 +83,23 @@ async def generate_question(
         question = question.strip()
         logger.info(f"Generated question {question_number} for {role}: {question[:50]}...")
         
+        if question:
+            _question_cache[cache_key] = question
+            if len(_question_cache) > QUESTION_CACHE_SIZE:
+                _question_cache.popitem(last=False)
+        
         return question
         
     except Exception as e:
         logger.error(f"Failed to generate question: {e}")
-        # Fallback на захардкоженные вопросы
-        questions = get_questions(role)
-        fallback_idx = min(question_number - 1, len(questions) - 1)
-        fallback_q = questions[fallback_idx]
-        logger.info(f"Using fallback question {question_number} for {role}: {fallback_q[:50]}...")
-        return fallback_q
+        return get_fallback_question(role, question_number)
+
+
+def get_fallback_question(role: str, question_number: int) -> str:
+    """Захардкоженный вопрос на случай, если AI не ответил."""
+    questions = get_questions(role)
+    fallback_idx = min(question_number - 1, len(questions) - 1)
+    fallback_q = questions[fallback_idx]
+    logger.info(f"Using fallback question {question_number} for {role}: {fallback_q[:50]}...")
+    return fallback_q
 
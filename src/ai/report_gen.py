@@ -2,6 +2,9 @@
 Генератор детального AI-отчёта.
 """
 import logging
+import re
+from itertools import chain
+
 from src.ai.client import chat_completion, stream_chat_completion
 from src.ai.answer_analyzer import calculate_category_scores
 
@@ -50,12 +53,51 @@ REPORT_SYSTEM_PROMPT = """Ты — эксперт по оценке специа
 - НЕ используй markdown (# ## * и т.д.) — только HTML"""
 
 
+# Для сравнения пунктов: регистр, пробелы и знаки по краям не важны
+_DEDUP_SPACES_RE = re.compile(r"\s+")
+_DEDUP_EDGE_CHARS = " .,;:!?—-–«»\"'()"
+
+
+def _dedup_key(text: str) -> str:
+    """Нормализованный ключ пункта: «Нет метрик.» и «нет  метрик» — один пункт."""
+    return _DEDUP_SPACES_RE.sub(" ", text.casefold()).strip(_DEDUP_EDGE_CHARS)
+
+
+def _unique_items(items) -> list[str]:
+    """Пункты без повторов по нормализованному ключу (оставляем первое написание)."""
+    unique: dict[str, str] = {}
+    for item in items:
+        unique.setdefault(_dedup_key(str(item)), item)
+    return list(unique.values())
+
+
+def collect_insights_and_gaps(
+    analysis_history: list[dict],
+    insights_per_answer: int | None = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Собрать инсайты и пробелы из анализов без повторов (порядок сохраняется).
+    
+    Args:
+        analysis_history: История анализов
+        insights_per_answer: Сколько инсайтов брать с одного ответа (None — все)
+    """
+    unique_insights = _unique_items(chain.from_iterable(
+        analysis.get("key_insights", ())[:insights_per_answer] for analysis in analysis_history
+    ))
+    unique_gaps = _unique_items(chain.from_iterable(
+        analysis.get("gaps", ()) for analysis in analysis_history
+    ))
+    return unique_insights, unique_gaps
+
+
 async def generate_detailed_report(
     role: str,
     role_name: str,
     experience: str,
     conversation_history: list[dict],
     analysis_history: list[dict],
+    scores: dict | None = None,
 ) -> str:
     """
     Сгенерировать детальный AI-отчёт.
@@ -66,12 +108,14 @@ async def generate_detailed_report(
         experience: Уровень опыта
         conversation_history: История вопросов и ответов
         analysis_history: История анализов
+        scores: Уже посчитанные баллы (чтобы не пересчитывать)
         
     Returns:
         Текст детального отчёта
     """
-    # Рассчитываем баллы
-    scores = calculate_category_scores(analysis_history)
+    # Рассчитываем баллы (если вызывающий их ещё не посчитал)
+    if scores is None:
+        scores = calculate_category_scores(analysis_history)
     
     # Формируем контекст диалога
     dialog_text = ""
@@ -92,12 +136,9 @@ async def generate_detailed_report(
     for i, item in enumerate(normalized_history, 1):
         dialog_text += f"\n\nВОПРОС {i}: {item.get('question', '')}\nОТВЕТ: {item.get('answer', '')}"
     
-    # Собираем все инсайты из анализов
-    all_insights = []
-    all_gaps = []
-    for analysis in analysis_history:
-        all_insights.extend(analysis.get("key_insights", []))
-        all_gaps.extend(analysis.get("gaps", []))
+    # Собираем инсайты из анализов: по одному главному с каждого ответа,
+    # чтобы промпт не раздувался и покрывал всю сессию, а не первые ответы
+    all_insights, all_gaps = collect_insights_and_gaps(analysis_history, insights_per_answer=1)
     
     insights_text = "\n".join('- ' + i for i in all_insights[:10]) if all_insights else '- Нет данных'
     gaps_text = "\n".join('- ' + g for g in all_gaps[:5]) if all_gaps else '- Не выявлено'
@@ -157,14 +198,16 @@ async def stream_detailed_report(
     experience: str,
     conversation_history: list[dict],
     analysis_history: list[dict],
+    scores: dict | None = None,
 ):
     """
     Потоковая генерация детального AI-отчёта.
     Yields:
         Chunks of the report text
     """
-    # Рассчитываем баллы
-    scores = calculate_category_scores(analysis_history)
+    # Рассчитываем баллы (если вызывающий их ещё не посчитал)
+    if scores is None:
+        scores = calculate_category_scores(analysis_history)
     
     # Формируем контекст диалога
     dialog_text = ""
@@ -184,12 +227,9 @@ async def stream_detailed_report(
     for i, item in enumerate(normalized_history, 1):
         dialog_text += f"\n\nВОПРОС {i}: {item.get('question', '')}\nОТВЕТ: {item.get('answer', '')}"
     
-    # Собираем все инсайты
-    all_insights = []
-    all_gaps = []
-    for analysis in analysis_history:
-        all_insights.extend(analysis.get("key_insights", []))
-        all_gaps.extend(analysis.get("gaps", []))
+    # Собираем инсайты из анализов: по одному главному с каждого ответа,
+    # чтобы промпт не раздувался и покрывал всю сессию, а не первые ответы
+    all_insights, all_gaps = collect_insights_and_gaps(analysis_history, insights_per_answer=1)
     
     insights_text_stream = "\n".join('- ' + i for i in all_insights[:10]) if all_insights else '- Нет данных'
     gaps_text_stream = "\n".join('- ' + g for g in all_gaps[:5]) if all_gaps else '- Не выявлено'
@@ -235,6 +275,23 @@ async def stream_detailed_report(
         yield generate_fallback_report(role_name, experience, scores, all_insights, all_gaps)
 
 
+# Уровень по итоговому баллу: (нижний порог, название), по убыванию порога
+SCORE_LEVELS = (
+    (80, "Senior / Lead"),
+    (60, "Middle+"),
+    (40, "Middle"),
+    (0, "Junior / Junior+"),
+)
+
+
+def get_score_level(total: int) -> str:
+    """Уровень кандидата по итоговому баллу (0-100)."""
+    for threshold, level in SCORE_LEVELS:
+        if total >= threshold:
+            return level
+    return SCORE_LEVELS[-1][1]
+
+
 def generate_fallback_report(
     role_name: str,
     experience: str,
@@ -245,14 +302,7 @@ def generate_fallback_report(
     """Fallback отчёт если AI недоступен."""
     
     total = scores["total"]
-    if total >= 80:
-        level = "Senior / Lead"
-    elif total >= 60:
-        level = "Middle+"
-    elif total >= 40:
-        level = "Middle"
-    else:
-        level = "Junior / Junior+"
+    level = get_score_level(total)
     
     insights_text = "\n".join(f"• {i}" for i in insights[:5]) if insights else "• Данные недоступны"
     gaps_text = "\n".join(f"• {g}" for g in gaps[:3]) if gaps else "• Не выявлено"
@@ -408,19 +458,10 @@ def split_message(text: str, max_length: int = 4000) -> list[str]:
     return parts
 
 
-def split_report_into_blocks(report: str) -> list[dict]:
-    """
-    Разбить отчёт на логические блоки для последовательной отправки.
-    
-    Returns:
-        Список блоков: [{"title": "...", "content": "...", "emoji": "..."}]
-    """
-    import re
-    
-    blocks = []
-    
-    # Паттерны для секций (числа с точкой или жирный заголовок)
-    section_patterns = [
+# Паттерны для секций отчёта (числа с точкой или жирный заголовок): (regex, emoji, title)
+REPORT_SECTION_PATTERNS = tuple(
+    (re.compile(pattern, re.IGNORECASE), emoji, title)
+    for pattern, emoji, title in (
         (r'1\.\s*\*?\*?ОБЩЕЕ ВПЕЧАТЛЕНИЕ\*?\*?', '📌', 'Общее впечатление'),
         (r'2\.\s*\*?\*?СИЛЬНЫЕ СТОРОНЫ\*?\*?', '💪', 'Сильные стороны'),
         (r'3\.\s*\*?\*?ЗОНЫ РАЗВИТИЯ\*?\*?', '📈', 'Зоны развития'),
@@ -430,14 +471,26 @@ def split_report_into_blocks(report: str) -> list[dict]:
         (r'7\.\s*\*?\*?MINDSET\*?\*?', '🎯', 'Mindset'),
         (r'8\.\s*\*?\*?РЕКОМЕНДАЦИИ\*?\*?', '📝', 'Рекомендации'),
         (r'9\.\s*\*?\*?ИТОГОВЫЙ ВЕРДИКТ\*?\*?', '🏆', 'Итоговый вердикт'),
-    ]
+    )
+)
+_SECTION_LEAD_RE = re.compile(r'^[\s\*\:]+')
+
+
+def split_report_into_blocks(report: str) -> list[dict]:
+    """
+    Разбить отчёт на логические блоки для последовательной отправки.
+    
+    Returns:
+        Список блоков: [{"title": "...", "content": "...", "emoji": "..."}]
+    """
+    blocks = []
     
     # Находим все секции
     text = report
     found_sections = []
     
-    for pattern, emoji, title in section_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    for pattern, emoji, title in REPORT_SECTION_PATTERNS:
+        match = pattern.search(text)
         if match:
             found_sections.append((match.start(), emoji, title, pattern))
     
@@ -460,8 +513,8 @@ def split_report_into_blocks(report: str) -> list[dict]:
         content = text[pos:end_pos].strip()
         
         # Убираем заголовок из контента (он уже в title)
-        content = re.sub(pattern, '', content, flags=re.IGNORECASE).strip()
-        content = re.sub(r'^[\s\*\:]+', '', content).strip()  # Убираем начальные символы
+        content = pattern.sub('', content).strip()
+        content = _SECTION_LEAD_RE.sub('', content).strip()  # Убираем начальные символы
         
         if content:
             blocks.append({
@@ -471,4 +524,3 @@ def split_report_into_blocks(report: str) -> list[dict]:
             })
     
     return blocks
-
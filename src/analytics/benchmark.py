@@ -180,6 +180,7 @@ async def get_benchmark(
     role_name: str,
     experience: str,
     experience_name: str,
+    with_details: bool = True,
 ) -> BenchmarkResult:
     """
     Получить полный бенчмарк для пользователя.
@@ -191,6 +192,8 @@ async def get_benchmark(
         role_name: Название роли
         experience: Уровень опыта (junior/middle/senior/lead)
         experience_name: Название уровня
+        with_details: Считать средние баллы и все инсайты. Если False —
+            только перцентили и основной инсайт (для краткой шапки)
     
     Returns:
         BenchmarkResult с полной аналитикой
@@ -205,25 +208,16 @@ async def get_benchmark(
     result.overall_percentile = overall_pct
     result.overall_total_sessions = overall_total
     
-    avg_overall, _ = await calculate_average_score(session)
-    result.avg_score_overall = avg_overall
-    
     # 2. По роли
     role_pct, role_total = await calculate_percentile(session, user_score, role=role)
     result.role_percentile = role_pct
     result.role_total_sessions = role_total
     
-    avg_role, _ = await calculate_average_score(session, role=role)
-    result.avg_score_role = avg_role
-    
     # 3. По опыту
     exp_pct, exp_total = await calculate_percentile(session, user_score, experience=experience)
     result.experience_percentile = exp_pct
     result.experience_total_sessions = exp_total
     
-    avg_exp, _ = await calculate_average_score(session, experience=experience)
-    result.avg_score_experience = avg_exp
-    
     # 4. По роли + опыту (самое точное)
     combined_pct, combined_total = await calculate_percentile(
         session, user_score, role=role, experience=experience
@@ -231,40 +225,53 @@ async def get_benchmark(
     result.combined_percentile = combined_pct
     result.combined_total_sessions = combined_total
     
-    avg_combined, _ = await calculate_average_score(session, role=role, experience=experience)
-    result.avg_score_combined = avg_combined
-    
     # Достаточно ли данных?
     result.has_enough_data = overall_total >= MIN_SESSIONS_FOR_STATS
     
+    if not with_details:
+        # Шапке хватает перцентиля — средние (8 запросов) и детали не считаем
+        result.insights = [_benchmark_headline(result)]
+        return result
+    
+    # Средние баллы для сравнения
+    result.avg_score_overall, _ = await calculate_average_score(session)
+    result.avg_score_role, _ = await calculate_average_score(session, role=role)
+    result.avg_score_experience, _ = await calculate_average_score(session, experience=experience)
+    result.avg_score_combined, _ = await calculate_average_score(
+        session, role=role, experience=experience
+    )
+    
     # Генерируем инсайты
     result.insights = _generate_benchmark_insights(result, user_score)
     
     return result
 
 
-def _generate_benchmark_insights(result: BenchmarkResult, user_score: int) -> list[str]:
-    """Сгенерировать инсайты на основе бенчмарка."""
-    insights = []
-    
-    # Выбираем лучший перцентиль для основного инсайта
+def _benchmark_headline(result: BenchmarkResult) -> str:
+    """Основной инсайт по лучшему перцентилю (нужны только перцентили)."""
     best_pct, comparison_group = result.get_best_percentile()
     
     if not comparison_group:
-        insights.append("📊 Пока недостаточно данных для сравнения — ты среди первых!")
-        return insights
+        return "📊 Пока недостаточно данных для сравнения — ты среди первых!"
     
-    # Основной инсайт по перцентилю
     if best_pct >= 90:
-        insights.append(f"🏆 Ты в <b>топ-{100 - best_pct}%</b> среди {comparison_group}!")
+        return f"🏆 Ты в <b>топ-{100 - best_pct}%</b> среди {comparison_group}!"
     elif best_pct >= 75:
-        insights.append(f"💪 Ты опережаешь <b>{best_pct}%</b> {comparison_group}")
+        return f"💪 Ты опережаешь <b>{best_pct}%</b> {comparison_group}"
     elif best_pct >= 50:
-        insights.append(f"📊 Ты в <b>верхней половине</b> среди {comparison_group}")
+        return f"📊 Ты в <b>верхней половине</b> среди {comparison_group}"
     elif best_pct >= 25:
-        insights.append(f"📈 Ты опережаешь <b>{best_pct}%</b> {comparison_group} — есть потенциал!")
+        return f"📈 Ты опережаешь <b>{best_pct}%</b> {comparison_group} — есть потенциал!"
     else:
-        insights.append(f"🌱 Ты в начале пути — впереди большой рост!")
+        return f"🌱 Ты в начале пути — впереди большой рост!"
+
+
+def _generate_benchmark_insights(result: BenchmarkResult, user_score: int) -> list[str]:
+    """Сгенерировать инсайты на основе бенчмарка."""
+    insights = [_benchmark_headline(result)]
+    
+    if not result.get_best_percentile()[1]:
+        return insights
     
     # Сравнение со средним
     if result.combined_total_sessions >= MIN_SESSIONS_FOR_STATS:
@@ -10,11 +10,12 @@
 """
 from dataclasses import dataclass, field
 from typing import Optional
+import heapq
 import re
 
 from src.ai.answer_analyzer import (
     ALL_METRICS,
-    METRIC_NAMES_RU,
+    get_metric_name_ru,
     METRIC_CATEGORIES,
     PATTERN_NAMES_RU,
 )
@@ -340,6 +341,14 @@ DEVELOPMENT_RESOURCES = {
     ],
 }
 
+# Иконки типов ресурсов в тексте профиля
+RESOURCE_TYPE_EMOJI = {"book": "📚", "course": "🎓", "practice": "🔧"}
+
+
+def _bullets(items: list[str]) -> str:
+    """Маркированный список — каждая строка с переводом строки на конце."""
+    return "".join(f"• {item}\n" for item in items)
+
 
 def _detect_style(
     scores: dict[str, float],
@@ -394,12 +403,10 @@ def _get_top_metrics(
     ascending: bool = False,
 ) -> list[str]:
     """Получить топ-N метрик по значению."""
-    sorted_metrics = sorted(
-        [(k, v) for k, v in scores.items() if k in ALL_METRICS],
-        key=lambda x: x[1],
-        reverse=not ascending,
-    )
-    return [m[0] for m in sorted_metrics[:n]]
+    candidates = [(k, v) for k, v in scores.items() if k in ALL_METRICS]
+    # Нужны только N крайних — частичный отбор вместо полной сортировки
+    select = heapq.nsmallest if ascending else heapq.nlargest
+    return [m[0] for m in select(n, candidates, key=lambda x: x[1])]
 
 
 def _determine_level(total_score: int, experience: str) -> tuple[str, str, str]:
@@ -595,12 +602,12 @@ def build_profile(
     
     # Описания для сильных сторон
     strengths_descriptions = [
-        f"<b>{METRIC_NAMES_RU.get(m, m)}</b>: {STRENGTH_DESCRIPTIONS.get(m, '')}"
+        f"<b>{get_metric_name_ru(m)}</b>: {STRENGTH_DESCRIPTIONS.get(m, '')}"
         for m in strengths
     ]
     
     growth_areas_descriptions = [
-        f"<b>{METRIC_NAMES_RU.get(m, m)}</b>: {GROWTH_DESCRIPTIONS.get(m, '')}"
+        f"<b>{get_metric_name_ru(m)}</b>: {GROWTH_DESCRIPTIONS.get(m, '')}"
         for m in growth_areas
     ]
     
@@ -683,13 +690,11 @@ def format_profile_text(profile: CompetencyProfile) -> str:
         patterns_text = f"\n<b>Выявленные паттерны:</b> {', '.join(pattern_names)}"
     
     # Ресурсы
-    resources_text = ""
-    if profile.recommended_resources:
-        resources_lines = []
-        for res in profile.recommended_resources[:3]:
-            emoji = {"book": "📚", "course": "🎓", "practice": "🔧"}.get(res.get("type", ""), "📌")
-            resources_lines.append(f"  {emoji} {res.get('title', '')} — <i>{res.get('reason', '')}</i>")
-        resources_text = "\n".join(resources_lines)
+    resources_text = "\n".join(
+        f"  {RESOURCE_TYPE_EMOJI.get(res.get('type', ''), '📌')} "
+        f"{res.get('title', '')} — <i>{res.get('reason', '')}</i>"
+        for res in profile.recommended_resources[:3]
+    )
     
     # Формируем match description без эмодзи (эмодзи уже есть в уровне)
     match_text = f"<i>{profile.level_match_description}</i>" if profile.level_match_description else ""
@@ -700,9 +705,9 @@ def format_profile_text(profile: CompetencyProfile) -> str:
 {match_text}
 
 <b>Сильные стороны:</b>
-{''.join(f"• {d}" + chr(10) for d in profile.strengths_descriptions)}
+{_bullets(profile.strengths_descriptions)}
 <b>Зоны развития:</b>
-{''.join(f"• {d}" + chr(10) for d in profile.growth_areas_descriptions)}
+{_bullets(profile.growth_areas_descriptions)}
 
 <b>Психологический профиль:</b>
 • Мышление: {thinking_style_name}
@@ -711,7 +716,7 @@ def format_profile_text(profile: CompetencyProfile) -> str:
 {patterns_text}
 
 <b>План развития:</b>
-{''.join(f"• {item}" + chr(10) for item in profile.development_plan)}
+{_bullets(profile.development_plan)}
 <b>Ресурсы:</b>
 {resources_text}"""
 
@@ -721,8 +726,8 @@ def format_profile_short(profile: CompetencyProfile) -> str:
     thinking_style_name = THINKING_STYLES.get(profile.thinking_style, {}).get("name", "Сбалансированный")
     comm_style_name = COMMUNICATION_STYLES.get(profile.communication_style, {}).get("name", "Адаптивный")
     
-    strengths_names = [METRIC_NAMES_RU.get(s, s) for s in profile.strengths]
-    growth_names = [METRIC_NAMES_RU.get(g, g) for g in profile.growth_areas]
+    strengths_names = [get_metric_name_ru(s) for s in profile.strengths]
+    growth_names = [get_metric_name_ru(g) for g in profile.growth_areas]
     
     return f"""Уровень: {profile.level} ({profile.total_score}/100)
 Сильные стороны: {', '.join(strengths_names)}
@@ -12,6 +12,18 @@ from datetime import datetime
 from typing import Optional
 
 
+# Бары ASCII-графика (индекс = балл // 10), строятся один раз
+GRAPH_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
+# Уровень в карточке сессии: (нижний порог, название), по убыванию порога
+SESSION_LEVELS = (
+    (80, "Senior/Lead"),
+    (60, "Middle+"),
+    (40, "Middle"),
+    (0, "Junior"),
+)
+
+
 @dataclass
 class SessionSummary:
     """Краткая информация о сессии для сравнения."""
@@ -242,6 +254,13 @@ def calculate_user_dynamics(sessions: list) -> UserDynamics:
     )
 
 
+def _format_graph_line(s: SessionSummary) -> str:
+    """Строка ASCII-графика: дата, бар (10 символов = 100 баллов), балл."""
+    date_str = s.completed_at.strftime("%d.%m")
+    bar = GRAPH_BARS[min(max(s.total_score // 10, 0), 10)]
+    return f"{date_str}: {bar} {s.total_score}\n"
+
+
 def format_dynamics_text(dynamics: UserDynamics) -> str:
     """
     Форматировать динамику для отправки в Telegram.
@@ -284,18 +303,10 @@ def format_dynamics_text(dynamics: UserDynamics) -> str:
         text += f"\n<i>Дней между диагностиками: {d.days_between}</i>"
     
     # График (ASCII)
-    text += "\n\n<b>📈 Динамика:</b>\n<code>"
-    
     # Показываем последние 5 сессий (от старой к новой)
     recent = dynamics.sessions[:5][::-1]  # Переворачиваем для хронологии
-    
-    for s in recent:
-        date_str = s.completed_at.strftime("%d.%m")
-        bar_len = s.total_score // 10  # 10 символов = 100 баллов
-        bar = "█" * bar_len + "░" * (10 - bar_len)
-        text += f"{date_str}: {bar} {s.total_score}\n"
-    
-    text += "</code>"
+    graph = "".join(_format_graph_line(s) for s in recent)
+    text += f"\n\n<b>📈 Динамика:</b>\n<code>{graph}</code>"
     
     # Призыв к действию
     if dynamics.total_sessions == 1:
@@ -309,14 +320,10 @@ def format_session_card(s: SessionSummary, index: int = 1) -> str:
     date_str = s.completed_at.strftime("%d.%m.%Y")
     
     # Уровень
-    if s.total_score >= 80:
-        level = "Senior/Lead"
-    elif s.total_score >= 60:
-        level = "Middle+"
-    elif s.total_score >= 40:
-        level = "Middle"
-    else:
-        level = "Junior"
+    level = next(
+        (name for threshold, name in SESSION_LEVELS if s.total_score >= threshold),
+        SESSION_LEVELS[-1][1],
+    )
     
     return f"""<b>{index}. {s.role_name}</b> • {date_str}
    📊 {s.total_score}/100 ({level})
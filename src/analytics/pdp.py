@@ -11,7 +11,7 @@ Personal Development Plan (PDP) — мощный персональный пла
 from dataclasses import dataclass, field
 from typing import Optional
 
-from src.ai.answer_analyzer import ALL_METRICS, METRIC_NAMES_RU
+from src.ai.answer_analyzer import ALL_METRICS, get_metric_name_ru
 
 
 # ========================================
@@ -96,6 +96,19 @@ class PersonalDevelopmentPlan:
     motivation_message: str = ""
 
 
+# Общая оценка по итоговому баллу: (нижний порог, оценка, главный фокус)
+OVERALL_ASSESSMENTS = (
+    (80, "Отличный уровень! Фокус на масштабировании влияния.",
+     "Развитие лидерских качеств и передача экспертизы"),
+    (60, "Хороший уровень с потенциалом роста.",
+     "Углубление экспертизы и развитие soft skills"),
+    (40, "Есть база, нужна фокусная работа над ключевыми навыками.",
+     "Укрепление фундамента и практика"),
+    (0, "Начало пути — важно сфокусироваться на основах.",
+     "Изучение основ и наработка практики"),
+)
+
+
 # ========================================
 # БАЗА ЗНАНИЙ: РЕСУРСЫ ПО МЕТРИКАМ
 # ========================================
@@ -708,18 +721,14 @@ def build_pdp(
     )
     
     # Общая оценка
-    if total_score >= 80:
-        pdp.overall_assessment = "Отличный уровень! Фокус на масштабировании влияния."
-        pdp.main_focus = "Развитие лидерских качеств и передача экспертизы"
-    elif total_score >= 60:
-        pdp.overall_assessment = "Хороший уровень с потенциалом роста."
-        pdp.main_focus = "Углубление экспертизы и развитие soft skills"
-    elif total_score >= 40:
-        pdp.overall_assessment = "Есть база, нужна фокусная работа над ключевыми навыками."
-        pdp.main_focus = "Укрепление фундамента и практика"
-    else:
-        pdp.overall_assessment = "Начало пути — важно сфокусироваться на основах."
-        pdp.main_focus = "Изучение основ и наработка практики"
+    pdp.overall_assessment, pdp.main_focus = next(
+        (
+            (assessment, focus)
+            for threshold, assessment, focus in OVERALL_ASSESSMENTS
+            if total_score >= threshold
+        ),
+        OVERALL_ASSESSMENTS[-1][1:],
+    )
     
     # Приоритизируем gaps
     prioritized = _prioritize_gaps(raw_averages, experience)
@@ -728,7 +737,7 @@ def build_pdp(
     for metric, gap, priority in prioritized[:3]:
         goal = DevelopmentGoal(
             metric=metric,
-            metric_name=METRIC_NAMES_RU.get(metric, metric),
+            metric_name=get_metric_name_ru(metric),
             current_score=raw_averages.get(metric, 5),
             target_score=min(10, raw_averages.get(metric, 5) + 2),
             gap=gap,
@@ -744,7 +753,7 @@ def build_pdp(
     for metric, gap, priority in prioritized[3:6]:
         goal = DevelopmentGoal(
             metric=metric,
-            metric_name=METRIC_NAMES_RU.get(metric, metric),
+            metric_name=get_metric_name_ru(metric),
             current_score=raw_averages.get(metric, 5),
             target_score=min(10, raw_averages.get(metric, 5) + 1.5),
             gap=gap,
@@ -15,7 +15,7 @@ from datetime import datetime, date
 from typing import Optional
 import random
 
-from src.ai.answer_analyzer import METRIC_NAMES_RU
+from src.ai.answer_analyzer import get_metric_name_ru
 
 # ==================== КОНСТАНТЫ ====================
 
@@ -269,7 +269,7 @@ def generate_pdp_plan(
     
     focus_skills = focus_skills[:3]
     
-    skill_names = [METRIC_NAMES_RU.get(s, s) for s in focus_skills]
+    skill_names = [get_metric_name_ru(s) for s in focus_skills]
     
     plan = PdpPlan30(
         focus_skills=focus_skills,
@@ -283,7 +283,7 @@ def generate_pdp_plan(
         if week_num <= 3:
             # Тематическая неделя
             skill = focus_skills[week_num - 1]
-            skill_name = METRIC_NAMES_RU.get(skill, skill)
+            skill_name = get_metric_name_ru(skill)
             theme = f"Погружение в {skill_name}"
             goal = f"Освоить базовые принципы и внедрить в работу"
             
@@ -363,9 +363,9 @@ def _generate_integration_week(week_num: int, skills: list[str]) -> WeekPlan:
     extended_skills = skills * 3  # Ensure we have enough items
     s1, s2, s3 = extended_skills[0], extended_skills[1], extended_skills[2]
     
-    n1 = METRIC_NAMES_RU.get(s1, s1)
-    n2 = METRIC_NAMES_RU.get(s2, s2)
-    n3 = METRIC_NAMES_RU.get(s3, s3)
+    n1 = get_metric_name_ru(s1)
+    n2 = get_metric_name_ru(s2)
+    n3 = get_metric_name_ru(s3)
     
     week.days[1] = [_create_task(s1, n1, "practice")]
     week.days[2] = [_create_task(s2, n2, "practice")]
@@ -18,13 +18,38 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.models import DiagnosticSession
 from src.ai.answer_analyzer import (
     ALL_METRICS,
-    METRIC_NAMES_RU,
+    get_metric_name_ru,
     METRIC_CATEGORIES,
     calculate_category_scores,
 )
 
 logger = logging.getLogger(__name__)
 
+# Категории в тексте прогресса (порядок вывода)
+CATEGORY_DISPLAY_NAMES = (
+    ("hard_skills", "🔧 Hard Skills"),
+    ("soft_skills", "🤝 Soft Skills"),
+    ("thinking", "🧠 Мышление"),
+    ("mindset", "💫 Mindset"),
+)
+
+# Бары текстового графика на 20 делений (индекс = балл // 5), строятся один раз
+GRAPH_BARS = tuple("█" * i + "░" * (20 - i) for i in range(21))
+
+
+def _change_arrow(change: int) -> str:
+    """Стрелка направления изменения балла."""
+    if change > 0:
+        return "↑"
+    if change < 0:
+        return "↓"
+    return "→"
+
+
+def _format_category_change(name: str, first: int, last: int, change: int) -> str:
+    """Строка изменения категории: «🔧 Hard Skills: 12 → 15 (↑3)»."""
+    return f"{name}: {first} → {last} ({_change_arrow(change)}{abs(change)})"
+
 
 @dataclass
 class ProgressReport:
@@ -267,7 +292,7 @@ def _generate_progress_recommendations(report: ProgressReport) -> list[str]:
     # По ухудшившимся метрикам
     if report.declined_metrics:
         worst_metric = report.declined_metrics[0]
-        metric_name = METRIC_NAMES_RU.get(worst_metric, worst_metric)
+        metric_name = get_metric_name_ru(worst_metric)
         
         advice_map = {
             "depth": "Практикуй технику '5 почему' для глубокого анализа",
@@ -290,7 +315,7 @@ def _generate_progress_recommendations(report: ProgressReport) -> list[str]:
     # По улучшившимся метрикам
     if report.improved_metrics:
         best_metric = report.improved_metrics[0]
-        metric_name = METRIC_NAMES_RU.get(best_metric, best_metric)
+        metric_name = get_metric_name_ru(best_metric)
         change = report.metric_changes.get(best_metric, 0)
         recommendations.append(
             f"⭐ Отличный рост в '{metric_name}' (+{change:.1f})! "
@@ -399,38 +424,24 @@ def format_progress_text(report: ProgressReport) -> str:
     graph = _generate_text_graph(report.score_history)
     
     # Изменения по категориям
-    category_lines = []
-    category_names = {
-        "hard_skills": "🔧 Hard Skills",
-        "soft_skills": "🤝 Soft Skills",
-        "thinking": "🧠 Мышление",
-        "mindset": "💫 Mindset",
-    }
-    
-    for cat, name in category_names.items():
-        first = report.first_categories.get(cat, 0)
-        last = report.last_categories.get(cat, 0)
-        change = report.category_changes.get(cat, 0)
-        
-        if change > 0:
-            arrow = "↑"
-        elif change < 0:
-            arrow = "↓"
-        else:
-            arrow = "→"
-        
-        category_lines.append(f"{name}: {first} → {last} ({arrow}{abs(change)})")
-    
-    categories_text = "\n".join(category_lines)
+    categories_text = "\n".join(
+        _format_category_change(
+            name,
+            report.first_categories.get(cat, 0),
+            report.last_categories.get(cat, 0),
+            report.category_changes.get(cat, 0),
+        )
+        for cat, name in CATEGORY_DISPLAY_NAMES
+    )
     
     # Улучшения и ухудшения
     changes_text = ""
     if report.improved_metrics:
-        improved_names = [METRIC_NAMES_RU.get(m, m) for m in report.improved_metrics[:3]]
+        improved_names = [get_metric_name_ru(m) for m in report.improved_metrics[:3]]
         changes_text += f"\n✅ <b>Улучшилось:</b> {', '.join(improved_names)}"
     
     if report.declined_metrics:
-        declined_names = [METRIC_NAMES_RU.get(m, m) for m in report.declined_metrics[:3]]
+        declined_names = [get_metric_name_ru(m) for m in report.declined_metrics[:3]]
         changes_text += f"\n⚠️ <b>Снизилось:</b> {', '.join(declined_names)}"
     
     # Рекомендации
@@ -464,8 +475,7 @@ def _generate_text_graph(score_history: list[tuple[datetime, int]]) -> str:
     
     for i, (date, score) in enumerate(score_history):
         # Формируем бар
-        bar_length = score // 5  # 20 символов максимум
-        bar = "█" * bar_length + "░" * (20 - bar_length)
+        bar = GRAPH_BARS[min(max(score // 5, 0), 20)]  # 20 символов максимум
         
         # Дата
         date_str = date.strftime("%d.%m") if date else f"#{i+1}"
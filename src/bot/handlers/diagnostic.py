@@ -3,14 +3,16 @@
 """
 import logging
 import asyncio
+import bisect
+import re
 import time
 import random
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
-from aiogram.enums import ChatAction
-from aiogram.exceptions import TelegramBadRequest
+from aiogram.enums import ChatAction, ContentType
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 
 from src.bot.states import DiagnosticStates
 from src.bot.keyboards.inline import (
@@ -34,18 +36,15 @@ from src.bot.keyboards.inline import (
     get_session_recovery_keyboard,
 )
 from src.bot.keyboards.reply import get_main_menu_reply_keyboard
-from src.core.prices import SHARE_PROMO_CODE
 from src.db.repositories import balance_repo
-from src.ai.question_gen import generate_question
+from src.ai.question_gen import generate_question, get_fallback_question
 from src.ai.cached_questions import get_cached_first_question
 from src.ai.answer_analyzer import (
     analyze_answer, 
     calculate_category_scores,
     calibrate_scores,
-    METRIC_NAMES_RU,
-    METRIC_CATEGORIES,
 )
-from src.ai.report_gen import generate_detailed_report, stream_detailed_report, split_message, split_report_into_blocks, sanitize_html, generate_fallback_report
+from src.ai.report_gen import generate_detailed_report, stream_detailed_report, split_message, sanitize_html, generate_fallback_report, collect_insights_and_gaps
 from src.ai.client import AIServiceError
 from src.analytics import build_profile, format_profile_text, get_benchmark, format_benchmark_text, build_pdp, format_pdp_text
 from src.db import get_session
@@ -57,37 +56,124 @@ from src.db.repositories import (
     create_session,
     get_or_create_user,
     get_active_session,
+    get_session_histories,
 )
-from src.db.repositories.reminder_repo import schedule_stuck_reminder, cancel_stuck_reminders, schedule_smart_reminder, cancel_all_user_reminders
+from src.db.repositories.reminder_repo import reschedule_stuck_reminder, cancel_stuck_reminders, schedule_smart_reminder, cancel_all_user_reminders
 from src.utils.message_splitter import send_long_message, send_with_continuation
 
 router = Router(name="diagnostic")
 logger = logging.getLogger(__name__)
 
+# Статичные клавиатуры без параметров — собираем один раз при импорте
+QUESTION_KEYBOARD = get_question_keyboard(show_skip=False)
+CONFIRM_ANSWER_KEYBOARD = get_confirm_answer_keyboard()
+POST_DIAGNOSTIC_KEYBOARD = get_post_diagnostic_keyboard()
+DEMO_RESULT_KEYBOARD = get_demo_result_keyboard()
+
 # Количество вопросов в зависимости от режима
 FULL_QUESTIONS = 10
 DEMO_QUESTIONS = 10
+# Режим -> число вопросов (неизвестный режим считаем полным)
+QUESTIONS_BY_MODE = {
+    "demo": DEMO_QUESTIONS,
+    "full": FULL_QUESTIONS,
+}
+
+# Разделы AI-отчёта ("3. <b>ЗОНЫ РАЗВИТИЯ</b>") — по ним показываем прогресс стриминга
+REPORT_SECTIONS = 9
+REPORT_SECTION_RE = re.compile(r"(\d+)\.\s*<b>([^<]+)</b>")
+REPORT_SECTION_LOOKBACK = 64
+# Бары прогресса генерации отчёта (индекс = pct // 10), строятся один раз
+REPORT_PROGRESS_BARS = tuple("▓" * i + "░" * (10 - i) for i in range(11))
+
+# Демо заканчивается саммари с баллами — подробный отчёт доступен после оплаты
+DEMO_REPORT_TEASER = (
+    "🔒 <b>Подробный отчёт</b> по всем 12 метрикам, сильным сторонам и зонам роста "
+    "доступен в полной версии."
+)
+# Сколько ждём следующий вопрос после анализа ответа (сек) — дальше берём запасной
+NEXT_QUESTION_TIMEOUT = 30
 # REMINDER_TIMEOUT удален, так как теперь через БД (5 минут по дефолту)
 
 def get_total_questions(mode: str) -> int:
     """Получить количество вопросов для режима."""
-    return DEMO_QUESTIONS if mode == "demo" else FULL_QUESTIONS
+    return QUESTIONS_BY_MODE.get(mode, FULL_QUESTIONS)
 
 # _reminder_tasks удален
 
+
+def _build_progress_bar(completed: int, total_questions: int) -> str:
+    """Прогресс-бар вида <code>███░░</code> 60%."""
+    filled = "█" * completed
+    empty = "░" * (total_questions - completed)
+    pct = int(completed / total_questions * 100)
+    return f"<code>{filled}{empty}</code> {pct}%"
+
+
+# Все возможные бары для штатных режимов — считаем один раз при загрузке
+_PROGRESS_BARS: dict[tuple[int, int], str] = {
+    (completed, total): _build_progress_bar(completed, total)
+    for total in set(QUESTIONS_BY_MODE.values())
+    for completed in range(total + 1)
+}
+
+
+# Индикатор "печатает" живёт ~5 сек на стороне Telegram — чаще раза в 4 сек слать нет смысла
+CHAT_ACTION_THROTTLE = 4.0
+# (chat_id, action) -> время отправки; порядок вставки = порядок по времени
+_last_chat_action: dict[tuple[int, str], float] = {}
+
+
 async def safe_send_chat_action(bot: Bot, chat_id: int, action: ChatAction) -> None:
     """Безопасная отправка chat action (игнорирует ошибки топиков/форумов)."""
+    now = time.monotonic()
+    key = (chat_id, action)
+    if now - _last_chat_action.get(key, -CHAT_ACTION_THROTTLE) < CHAT_ACTION_THROTTLE:
+        return  # Индикатор ещё висит после прошлой отправки
+    # Выкидываем устаревшие записи с начала словаря, иначе он растёт со всеми чатами
+    while _last_chat_action:
+        oldest = next(iter(_last_chat_action))
+        if now - _last_chat_action[oldest] < CHAT_ACTION_THROTTLE:
+            break
+        del _last_chat_action[oldest]
+    _last_chat_action.pop(key, None)  # Переставляем ключ в конец
+    _last_chat_action[key] = now
     try:
         await bot.send_chat_action(chat_id, action)
     except Exception:
         pass  # Игнорируем ошибки (топики, форумы, etc)
 
 
+# Ссылки на фоновые задачи, чтобы их не собрал GC до завершения
+_background_tasks: set[asyncio.Task] = set()
+
+
+def track_background_task(task: asyncio.Task) -> None:
+    """Держит ссылку на задачу до её завершения (её дождётся shutdown_background_tasks)."""
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def fire_chat_action(bot: Bot, chat_id: int, action: ChatAction = ChatAction.TYPING) -> None:
+    """Отправить chat action в фоне, не задерживая основной ответ."""
+    track_background_task(asyncio.create_task(safe_send_chat_action(bot, chat_id, action)))
+
+
+# Milestone-сообщения по номеру вопроса
+MILESTONE_MESSAGES = {
+    5: "🎯 <b>Половина пути!</b>\nОтличный темп — продолжай в том же духе! 💪",
+    8: "🏁 <b>Финишная прямая!</b>\nОсталось всего 2 вопроса!",
+    10: "🎉 <b>Последний ответ принят!</b>\nСейчас подготовлю твой результат...",
+}
+
+
 def generate_progress_message(
     current_question: int,
     total_questions: int,
     answer_stats: list[dict],
     answer_text: str,
+    prev_max_length: int = 0,
+    deep_streak: int = 0,
 ) -> str:
     """
     Генерация сообщения с прогрессом и gamification.
@@ -96,60 +182,82 @@ def generate_progress_message(
     - Визуальный прогресс-бар
     - Milestone messages на 5, 8, 10 вопросе
     - Micro-feedback по длине/скорости ответа
+
+    prev_max_length — самый длинный из предыдущих ответов, deep_streak —
+    число глубоких ответов подряд с учётом текущего. Оба копятся в FSM,
+    чтобы не пересканировать answer_stats на каждом ответе.
     """
-    # Прогресс-бар
+    # Прогресс-бар (из таблицы; для нештатного количества вопросов — на лету)
     completed = current_question
-    remaining = total_questions - completed
-    filled = "█" * completed
-    empty = "░" * remaining
-    pct = int(completed / total_questions * 100)
-    
-    # Базовое сообщение
-    progress_bar = f"<code>{filled}{empty}</code> {pct}%"
+    progress_bar = _PROGRESS_BARS.get((completed, total_questions))
+    if progress_bar is None:
+        progress_bar = _build_progress_bar(completed, total_questions)
     
     # Milestone messages (приоритетные)
-    milestone = ""
-    if current_question == 5:
-        milestone = "\n\n🎯 <b>Половина пути!</b>\nОтличный темп — продолжай в том же духе! 💪"
-    elif current_question == 8:
-        milestone = "\n\n🏁 <b>Финишная прямая!</b>\nОсталось всего 2 вопроса!"
-    elif current_question == 10:
-        milestone = "\n\n🎉 <b>Последний ответ принят!</b>\nСейчас подготовлю твой результат..."
+    milestone = MILESTONE_MESSAGES.get(current_question, "")
     
     answer_len = len(answer_text)
     
     # Streak detection (быстрые/глубокие ответы подряд)
     streak = ""
     if len(answer_stats) >= 3:
-        recent = answer_stats[-3:]
-        avg_duration = sum(s["duration_sec"] for s in recent) / 3
+        # Три последних ответа — по индексам, без копии списка
+        avg_duration = (
+            answer_stats[-1]["duration_sec"]
+            + answer_stats[-2]["duration_sec"]
+            + answer_stats[-3]["duration_sec"]
+        ) / 3
         if avg_duration < 120:  # Менее 2 минут в среднем
-            streak = "\n\n⚡ <i>Держишь отличный темп!</i>"
-        
-        # Считаем сколько глубоких ответов подряд (с конца)
-        deep_streak = 0
-        for stat in reversed(answer_stats):
-            if stat["length"] > 300:
-                deep_streak += 1
-            else:
-                break
+            streak = "⚡ <i>Держишь отличный темп!</i>"
         
         if deep_streak >= 3:
-            streak = f"\n\n🔥 <i>{deep_streak} глубоких ответов подряд — молодец!</i>"
+            streak = f"🔥 <i>{deep_streak} глубоких ответов подряд — молодец!</i>"
     
     # Achievement для первого длинного ответа (ранний показатель)
-    if current_question <= 3 and answer_len > 400 and not any(s["length"] > 400 for s in answer_stats[:-1] if answer_stats):
-        streak = "\n\n🌟 <i>Сразу видно — ты подходишь серьёзно!</i>"
+    if current_question <= 3 and answer_len > 400 and prev_max_length <= 400:
+        streak = "🌟 <i>Сразу видно — ты подходишь серьёзно!</i>"
     
     # Рандомная позитивная реакция (если нет milestone или streak)
     reaction = ""
     if not milestone and not streak:
-        reaction = f"\n\n<i>{get_random_reaction(answer_len)}</i>"
+        reaction = f"<i>{get_random_reaction(answer_len)}</i>"
     
-    # Собираем финальное сообщение
+    # Собираем финальное сообщение (пустые блоки пропускаем)
     header = f"✅ <b>Ответ {current_question}/{total_questions} принят!</b>"
+    parts = [header, progress_bar]
+    if milestone:
+        parts.append(milestone)
+    if streak:
+        parts.append(streak)
+    if reaction:
+        parts.append(reaction)
     
-    return f"{header}\n\n{progress_bar}{milestone}{streak}{reaction}"
+    return "\n\n".join(parts)
+
+
+def _summarize_answer_stats(answer_stats: list[dict]) -> tuple[int, int, int, int, int, int, int]:
+    """
+    Все агрегаты для итоговых достижений за один проход по answer_stats.
+
+    Returns:
+        (total_time, total_length, sum_sq_length, long_count,
+         first5_length, rest_length, rest_count)
+    """
+    total_time = total_length = sum_sq = long_count = 0
+    first5_length = rest_length = rest_count = 0
+    for i, s in enumerate(answer_stats):
+        length = s["length"]
+        total_time += s["duration_sec"]
+        total_length += length
+        sum_sq += length * length
+        if length > 300:
+            long_count += 1
+        if i < 5:
+            first5_length += length
+        else:
+            rest_length += length
+            rest_count += 1
+    return total_time, total_length, sum_sq, long_count, first5_length, rest_length, rest_count
 
 
 def generate_final_achievements(answer_stats: list[dict]) -> str:
@@ -167,13 +275,12 @@ def generate_final_achievements(answer_stats: list[dict]) -> str:
     
     achievements: list[str] = []
     
-    # Общее время
-    total_time = sum(s["duration_sec"] for s in answer_stats)
-    avg_time = total_time / len(answer_stats) if answer_stats else 0
-    
-    # Общая длина
-    total_length = sum(s["length"] for s in answer_stats)
-    avg_length = total_length / len(answer_stats) if answer_stats else 0
+    n = len(answer_stats)
+    (
+        total_time, total_length, sum_sq,
+        long_count, first5_length, rest_length, rest_count,
+    ) = _summarize_answer_stats(answer_stats)
+    avg_length = total_length / n
     
     # === TIME ACHIEVEMENTS ===
     if total_time < 900:  # < 15 минут
@@ -192,25 +299,22 @@ def generate_final_achievements(answer_stats: list[dict]) -> str:
         achievements.append("💨 <b>Лаконичность</b> — краткость — сестра таланта")
     
     # === STREAK ACHIEVEMENTS ===
-    long_answers = [s for s in answer_stats if s["length"] > 300]
-    if len(long_answers) >= 8:
+    if long_count >= 8:
         achievements.append("🔥 <b>Серия эксперта</b> — 8+ глубоких ответов")
-    elif len(long_answers) >= 5:
+    elif long_count >= 5:
         achievements.append("✨ <b>Глубокий анализ</b> — 5+ развёрнутых ответов")
     
     # === CONSISTENCY ===
-    lengths = [s["length"] for s in answer_stats]
-    if lengths:
-        variance = sum((l - avg_length) ** 2 for l in lengths) / len(lengths)
-        std_dev = variance ** 0.5
-        if std_dev < 50:  # Очень стабильные ответы
-            achievements.append("🎯 <b>Стабильность</b> — ровное качество ответов")
+    variance = max(0.0, sum_sq / n - avg_length ** 2)
+    std_dev = variance ** 0.5
+    if std_dev < 50:  # Очень стабильные ответы
+        achievements.append("🎯 <b>Стабильность</b> — ровное качество ответов")
     
     # === SPECIAL PATTERNS ===
     # Разгон — последние ответы длиннее первых
-    if len(answer_stats) >= 5:
-        first_half = sum(s["length"] for s in answer_stats[:5]) / 5
-        second_half = sum(s["length"] for s in answer_stats[5:]) / max(1, len(answer_stats[5:]))
+    if n >= 5:
+        first_half = first5_length / 5
+        second_half = rest_length / max(1, rest_count)
         if second_half > first_half * 1.5:
             achievements.append("📈 <b>Разгон</b> — раскрылся к концу!")
     
@@ -223,24 +327,27 @@ def generate_final_achievements(answer_stats: list[dict]) -> str:
     return "\n\n" + "\n".join(displayed)
 
 
+# Подсказки по длине ответа: (верхняя граница длины, подсказка), по возрастанию
+TYPING_HINTS = (
+    (50, "💡 <i>Совет: добавь деталей для более точного анализа</i>"),
+    (100, "📝 <i>Неплохо! Но чем больше деталей — тем точнее результат</i>"),
+    (200, "👍 <i>Хороший ответ!</i>"),
+    (400, "✨ <i>Отличный развёрнутый ответ!</i>"),
+    (700, "🔥 <i>Впечатляющая детализация!</i>"),
+)
+LONG_ANSWER_HINT = "📚 <i>Вау, очень подробно! Это точно поможет анализу</i>"
+# Границы и тексты отдельно — для bisect (последний текст — для длиннее всех границ)
+_TYPING_HINT_LIMITS = tuple(limit for limit, _ in TYPING_HINTS)
+_TYPING_HINT_TEXTS = tuple(hint for _, hint in TYPING_HINTS) + (LONG_ANSWER_HINT,)
+
+
 def get_typing_hint(answer_length: int) -> str:
     """
     Генерация подсказки по длине ответа (показывается в preview).
     
     Помогает пользователю понять, достаточно ли развёрнутый ответ.
     """
-    if answer_length < 50:
-        return "💡 <i>Совет: добавь деталей для более точного анализа</i>"
-    elif answer_length < 100:
-        return "📝 <i>Неплохо! Но чем больше деталей — тем точнее результат</i>"
-    elif answer_length < 200:
-        return "👍 <i>Хороший ответ!</i>"
-    elif answer_length < 400:
-        return "✨ <i>Отличный развёрнутый ответ!</i>"
-    elif answer_length < 700:
-        return "🔥 <i>Впечатляющая детализация!</i>"
-    else:
-        return "📚 <i>Вау, очень подробно! Это точно поможет анализу</i>"
+    return _TYPING_HINT_TEXTS[bisect.bisect_right(_TYPING_HINT_LIMITS, answer_length)]
 
 
 # Пул позитивных реакций (не оценочных!)
@@ -267,6 +374,25 @@ DEEP_REACTIONS = [
 ]
 
 
+def _shuffled_cycle(items: list[str]):
+    """
+    Бесконечный перебор реакций: каждый круг — новая перестановка.
+
+    Внутри круга реакции не повторяются, на стыке кругов тоже.
+    """
+    last = None
+    while True:
+        batch = random.sample(items, len(items))
+        if len(batch) > 1 and batch[0] == last:
+            batch[0], batch[-1] = batch[-1], batch[0]
+        yield from batch
+        last = batch[-1]
+
+
+_POSITIVE_REACTIONS_ITER = _shuffled_cycle(POSITIVE_REACTIONS)
+_DEEP_REACTIONS_ITER = _shuffled_cycle(DEEP_REACTIONS)
+
+
 def get_random_reaction(answer_length: int) -> str:
     """
     Генерация рандомной позитивной реакции.
@@ -275,9 +401,9 @@ def get_random_reaction(answer_length: int) -> str:
     """
     if answer_length > 400:
         # Для длинных ответов — специальные реакции
-        return random.choice(DEEP_REACTIONS)
+        return next(_DEEP_REACTIONS_ITER)
     else:
-        return random.choice(POSITIVE_REACTIONS)
+        return next(_POSITIVE_REACTIONS_ITER)
 
 
 async def start_reminder(user_id: int, session_id: int):
@@ -286,10 +412,8 @@ async def start_reminder(user_id: int, session_id: int):
         return
     try:
         async with get_session() as db:
-            # Сначала отменяем старые, чтобы не дублировать
-            await cancel_stuck_reminders(db, session_id)
-            # Планируем новое (5 минут)
-            await schedule_stuck_reminder(db, user_id, session_id, minutes_delay=5)
+            # Переносим активное напоминание на 5 минут (или создаём новое)
+            await reschedule_stuck_reminder(db, user_id, session_id, minutes_delay=5)
             await db.commit()
     except Exception as e:
         logger.error(f"Failed to start reminder: {e}")
@@ -307,6 +431,172 @@ async def cancel_reminder(session_id: int):
         logger.error(f"Failed to cancel reminder: {e}")
 
 
+def fire_cancel_reminder(session_id: int) -> None:
+    """Отменить напоминание в фоне — юзер не ждёт БД перед ответом бота."""
+    if not session_id:
+        return
+    track_background_task(asyncio.create_task(cancel_reminder(session_id)))
+
+
+# Кадры ожидания первого вопроса: (сколько ждём перед кадром, кадр)
+FIRST_QUESTION_ANIMATION = (
+    (2.0, ("▓▓▓▓▓░░░░░", "50%", "Подбираю вопросы...")),
+    (4.0, ("▓▓▓▓▓▓▓▓░░", "80%", "Почти готово...")),
+)
+
+
+# Статистика ответов для gamification: telegram_id -> записи по вопросам.
+# Держим в памяти процесса, а не в FSM: не гоняем растущий список через Redis
+# на каждом ответе. После рестарта бота теряется — это не критично.
+_answer_stats: dict[int, list[dict]] = {}
+
+
+def reset_answer_stats(user_id: int) -> None:
+    """Начинает статистику ответов заново (новая или восстановленная сессия)."""
+    _answer_stats[user_id] = []
+
+
+def discard_answer_stats(user_id: int) -> None:
+    """Забывает статистику ответов (диагностику отменили, бросили или завершили)."""
+    _answer_stats.pop(user_id, None)
+
+
+# Фоновые записи ответов в БД: db_session_id -> незавершённые задачи
+_pending_writes: dict[int, list[asyncio.Task]] = {}
+
+
+async def _persist_answer(
+    session_id: int,
+    question_number: int,
+    question_text: str,
+    answer_text: str,
+    analysis: dict,
+    history: list[dict],
+    analysis_history: list[dict],
+    replace: bool = False,
+) -> None:
+    """Сохраняет ответ и прогресс сессии одной транзакцией."""
+    async with get_session() as db:
+        await save_answer(
+            db,
+            session_id,
+            question_number,
+            question_text,
+            answer_text,
+            analysis,
+            commit=False,
+            replace=replace,
+        )
+        await update_session_progress(
+            db,
+            session_id,
+            question_number,
+            history,
+            analysis_history,
+            commit=False,
+        )
+        await db.commit()
+
+
+def _log_persist_failure(task: asyncio.Task) -> None:
+    """Фоновая запись не должна падать молча."""
+    if not task.cancelled() and task.exception():
+        logger.error(f"Failed to persist answer in background: {task.exception()}")
+
+
+def _forget_pending_write(session_id: int, task: asyncio.Task) -> None:
+    """Убирает завершённую запись из _pending_writes (сессию могли бросить без flush)."""
+    pending = _pending_writes.get(session_id)
+    if pending is None or task not in pending:
+        return  # Уже забрана flush_pending_writes
+    pending.remove(task)
+    if not pending:
+        del _pending_writes[session_id]
+
+
+def schedule_answer_persist(session_id: int, *args, **kwargs) -> None:
+    """Запускает запись ответа в фоне — юзер не ждёт БД перед следующим вопросом."""
+    task = asyncio.create_task(_persist_answer(session_id, *args, **kwargs))
+    task.add_done_callback(_log_persist_failure)
+    task.add_done_callback(lambda t, sid=session_id: _forget_pending_write(sid, t))
+    _pending_writes.setdefault(session_id, []).append(task)
+
+
+async def flush_pending_writes(session_id: int) -> None:
+    """Дожидается фоновых записей сессии (перед чтением истории и завершением)."""
+    pending = _pending_writes.pop(session_id, [])
+    if pending:
+        # shield: отмена хендлера не должна обрывать сами записи
+        await asyncio.shield(asyncio.gather(*pending, return_exceptions=True))
+
+
+async def shutdown_background_tasks() -> None:
+    """
+    Останов бота: дожидается фоновых задач.
+
+    Вызывается до close_db — записи ответов должны успеть лечь в БД.
+    """
+    pending = [task for tasks in _pending_writes.values() for task in tasks]
+    pending.extend(_background_tasks)
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _finalize_session(
+    session_id: int,
+    scores: dict,
+    report_text: str,
+    history: list[dict],
+    analysis_history: list[dict],
+    data: dict,
+) -> str:
+    """
+    Фиксирует завершение сессии и считает бенчмарк в одной сессии БД
+    (вызывается под shield).
+    
+    Returns:
+        Строка с бенчмарком для саммари (пустая, если данных мало)
+    """
+    benchmark_summary = ""
+    async with get_session() as db:
+        await complete_session(
+            db,
+            session_id,
+            scores,
+            report_text,
+            history,
+            analysis_history
+        )
+        
+        # Q1 1.4: Real-time Benchmarking
+        try:
+            # Получаем бенчмарк
+            benchmark_res = await get_benchmark(
+                session=db,
+                user_score=scores['total'],
+                role=data["role"],
+                role_name=data["role_name"],
+                experience=data["experience"],
+                experience_name=data.get("experience_name", data["experience"]),
+                # В саммари — только перцентиль и главный инсайт
+                with_details=False,
+            )
+            
+            if benchmark_res.has_enough_data:
+                best_pct, group = benchmark_res.get_best_percentile()
+                # Формируем краткую строку для саммари
+                benchmark_summary = f"\n📊 <b>Топ-{100 - best_pct}%</b> среди {group}"
+                
+                # Также можно добавить инсайт, если он есть
+                if benchmark_res.insights:
+                    benchmark_summary += f"\n<i>{benchmark_res.insights[0]}</i>"
+                    
+        except Exception as e:
+            logger.error(f"Failed to get benchmark: {e}")
+    
+    return benchmark_summary
+
+
 @router.callback_query(F.data == "start_diagnostic")
 async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot):
     """Начало диагностики — первый вопрос."""
@@ -344,7 +634,7 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
                 if active_session:
                     logger.info(f"Restoring session {active_session.id} for user {user.id}")
                     # Восстанавливаем данные в стейт
-                    await state.update_data(
+                    restored = dict(
                         role=active_session.role,
                         role_name=active_session.role_name,
                         experience=active_session.experience,
@@ -353,12 +643,13 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
                         db_session_id=active_session.id,
                         current_question=active_session.current_question,
                         diagnostic_mode=active_session.mode,
-                        conversation_history=active_session.conversation_history or [],
-                        analysis_history=active_session.analysis_history or [],
-                        answer_stats=[], # Статистика может быть потеряна, но это не критично
+                        max_answer_length=0,
+                        deep_streak=0,
                     )
-                    # Обновляем data, чтобы пройти проверки ниже
-                    data = await state.get_data()
+                    # data уже прочитан — пишем целиком (set_data), без лишнего GET внутри update_data
+                    data = {**data, **restored}
+                    await state.set_data(data)
+                    reset_answer_stats(callback.from_user.id)  # Статистика может быть потеряна, но это не критично
                     
                     # Если сессия уже была в процессе, перенаправляем на восстановление
                     if active_session.current_question > 1:
@@ -378,11 +669,12 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
                                 analysis_history=active_session.analysis_history
                             )
                             
-                            await state.update_data(current_question_text=question)
+                            data["current_question_text"] = question
+                            await state.set_data(data)
                             
                             await callback.message.answer(
                                 f"{active_session.current_question}️⃣ <b>Вопрос {active_session.current_question}/{get_total_questions(active_session.mode)}</b>\n\n{question}",
-                                reply_markup=get_question_keyboard(show_skip=False)
+                                reply_markup=QUESTION_KEYBOARD
                             )
                             await state.set_state(DiagnosticStates.answering)
                             
@@ -420,22 +712,61 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
         db_session_id = data.get("db_session_id")
         
         if not db_session_id:
-            # ==================== ПРОВЕРКА ДОСТУПА ====================
-            async with get_session() as db:
-                # Если db_user_id нет в стейте — восстанавливаем
-                if not db_user_id:
-                    user = await get_or_create_user(
-                        session=db,
-                        telegram_id=user_id,
-                        username=callback.from_user.username,
-                        first_name=callback.from_user.first_name,
-                        last_name=callback.from_user.last_name,
-                    )
-                    db_user_id = user.id
-                    await state.update_data(db_user_id=db_user_id)
-                
-                # Проверяем доступ используя PK пользователя!
-                access = await balance_repo.check_diagnostic_access(db, db_user_id)
+            # ==================== ДОСТУП + СПИСАНИЕ + СОЗДАНИЕ ====================
+            # Одна сессия БД (один checkout из пула и один COMMIT) на весь старт
+            success = False
+            try:
+                async with get_session() as db:
+                    # Если db_user_id нет в стейте — восстанавливаем
+                    if not db_user_id:
+                        user = await get_or_create_user(
+                            session=db,
+                            telegram_id=user_id,
+                            username=callback.from_user.username,
+                            first_name=callback.from_user.first_name,
+                            last_name=callback.from_user.last_name,
+                        )
+                        db_user_id = user.id
+                    
+                    # Проверяем доступ используя PK пользователя!
+                    access = await balance_repo.check_diagnostic_access(db, db_user_id)
+                    
+                    if access.allowed:
+                        # Определяем режим (demo или full)
+                        diagnostic_mode = access.mode  # "demo" или "full"
+                        logger.info(f"[ACCESS] User {user_id}: mode={diagnostic_mode}, balance={access.balance}")
+                        
+                        # 1. Списываем диагностику с баланса (без коммита)
+                        success = await balance_repo.use_diagnostic(db, db_user_id, diagnostic_mode, commit=False)
+                    
+                    if success:
+                        # 2. Очищаем все старые напоминания
+                        await cancel_all_user_reminders(db, db_user_id)
+
+                        # 3. Создаем сессию (без коммита)
+                        diagnostic_session = await create_session(
+                            session=db,
+                            user_id=db_user_id,
+                            role=data["role"],
+                            role_name=data["role_name"],
+                            experience=data["experience"],
+                            experience_name=data["experience_name"],
+                            mode=diagnostic_mode,
+                            commit=False,
+                        )
+                        # PK уже есть после flush внутри create_session — refresh не нужен
+                        db_session_id = diagnostic_session.id
+
+                        # 4. Фиксируем изменения
+                        await db.commit()
+                        
+                        logger.info(f"Created {diagnostic_mode} session {db_session_id} for user {user_id}")
+                    
+            except Exception as e:
+                logger.error(f"Failed to create session in DB: {e}")
+                await state.set_state(DiagnosticStates.ready_to_start)
+                await callback.answer("Ошибка базы данных. Попробуй позже.", show_alert=True)
+                return
             
             if not access.allowed:
                 # Возвращаем состояние назад, если отказ
@@ -452,66 +783,18 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
                 await callback.answer("Нужна подписка", show_alert=True)
                 return
             
-            # Определяем режим (demo или full)
-            diagnostic_mode = access.mode  # "demo" или "full"
-            total_questions = get_total_questions(diagnostic_mode)
-            
-            logger.info(f"[ACCESS] User {user_id}: mode={diagnostic_mode}, balance={access.balance}")
-            
-            # ==================== ТРАНЗАКЦИЯ: СПИСАНИЕ + СОЗДАНИЕ ====================
-            try:
-                async with get_session() as db:
-                    # 1. Списываем диагностику с баланса (без коммита)
-                    success = await balance_repo.use_diagnostic(db, db_user_id, diagnostic_mode, commit=False)
-                    if not success:
-                        # Если вдруг баланс изменился между проверкой и списанием
-                        await state.set_state(DiagnosticStates.ready_to_start)
-                        await callback.answer("Ошибка доступа: баланс исчерпан", show_alert=True)
-                        return
-
-                    # 2. Очищаем все старые напоминания
-                    await cancel_all_user_reminders(db, db_user_id)
-
-                    # 3. Создаем сессию (без коммита)
-                    diagnostic_session = await create_session(
-                        session=db,
-                        user_id=db_user_id,
-                        role=data["role"],
-                        role_name=data["role_name"],
-                        experience=data["experience"],
-                        experience_name=data["experience_name"],
-                        mode=diagnostic_mode,
-                        commit=False,
-                    )
-                    
-                    # 3. Фиксируем изменения
-                    await db.commit()
-                    await db.refresh(diagnostic_session)
-                    db_session_id = diagnostic_session.id
-                    
-                    logger.info(f"Created {diagnostic_mode} session {db_session_id} for user {user_id}")
-                    
-            except Exception as e:
-                logger.error(f"Failed to create session in DB: {e}")
+            if not success:
+                # Если вдруг баланс изменился между проверкой и списанием
                 await state.set_state(DiagnosticStates.ready_to_start)
-                await callback.answer("Ошибка базы данных. Попробуй позже.", show_alert=True)
+                await callback.answer("Ошибка доступа: баланс исчерпан", show_alert=True)
                 return
+            
+            total_questions = get_total_questions(diagnostic_mode)
         else:
             # Сессия уже есть (восстановлена)
             diagnostic_mode = data.get("diagnostic_mode", "full")
             total_questions = get_total_questions(diagnostic_mode)
         
-        await state.update_data(
-            current_question=1,
-            conversation_history=[],
-            analysis_history=[],
-            answer_stats=[],  # Статистика ответов для gamification
-            question_start_time=time.time(),  # Трекаем время на ответ
-            db_session_id=db_session_id,  # Сохраняем ID сессии
-            diagnostic_mode=diagnostic_mode,  # "demo" или "full"
-            total_questions=total_questions,  # 3 или 10
-        )
-        
         # Пробуем взять первый вопрос из кэша (мгновенно!)
         cached_question = get_cached_first_question(data["role"], data["experience"])
         
@@ -523,60 +806,79 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
                 )
             except TelegramBadRequest:
                 return
-            await asyncio.sleep(0.5)  # Минимальная задержка для UX
             question = cached_question
             logger.info(f"Using cached first question for {data['role']}/{data['experience']}")
         else:
-            # Кэш не найден — генерируем через AI с анимацией
+            # Кэш не найден — генерируем, параллельно с анимацией
+            question_task = asyncio.create_task(generate_question(
+                role=data["role"],
+                role_name=data.get("role_name", "Специалист"),
+                experience=data["experience"],
+                question_number=1,
+                conversation_history=[],
+                analysis_history=[]
+            ))
+
+            fire_chat_action(bot, callback.message.chat.id)
             try:
                 loading_msg = await callback.message.edit_text(
                     "🧠 <b>Подготавливаю диагностику...</b>\n\n<code>░░░░░░░░░░</code> 0%"
                 )
             except TelegramBadRequest:
+                question_task.cancel()
                 return
-            
+
             async def animate_first_question():
-                states = [
-                    ("▓▓░░░░░░░░", "20%", "Анализирую профиль..."),
-                    ("▓▓▓▓░░░░░░", "40%", "Формирую стратегию..."),
-                    ("▓▓▓▓▓▓░░░░", "60%", "Подбираю вопросы..."),
-                    ("▓▓▓▓▓▓▓▓░░", "80%", "Почти готово..."),
-                    ("▓▓▓▓▓▓▓▓▓▓", "100%", "Поехали!"),
-                ]
-                for bar, pct, text in states:
-                    await loading_msg.edit_text(
-                        f"🧠 <b>{text}</b>\n\n<code>{bar}</code> {pct}"
-                    )
-                    await asyncio.sleep(0.5)
-            
-            # Запускаем анимацию и генерацию параллельно
-            # Но реально анимация здесь блокирующая, так что просто перед генерацией
+                # Не больше двух edit'ов и только пока вопрос не готов —
+                # косметика не должна тратить лимит Telegram API
+                for wait_sec, (bar, pct, text) in FIRST_QUESTION_ANIMATION:
+                    await asyncio.wait({question_task}, timeout=wait_sec)
+                    if question_task.done():
+                        return
+                    try:
+                        await loading_msg.edit_text(
+                            f"🧠 <b>{text}</b>\n\n<code>{bar}</code> {pct}"
+                        )
+                    except TelegramBadRequest as e:
+                        if "message is not modified" not in str(e):
+                            logger.warning(f"First question animation stopped: {e}")
+                            return
+
             await animate_first_question()
-            
-            question = await generate_question(
-                role=data["role"],
-                role_name=data.get("role_name", "Специалист"),
-                experience=data["experience"],
-                question_number=1,
-                conversation_history=[],
-                analysis_history=[]
-            )
+
+            question = await question_task
         
-        # Сохраняем вопрос
-        await state.update_data(current_question_text=question)
+        # Сохраняем всё состояние одной записью в хранилище
+        # (data прочитан в начале хендлера — set_data вместо update_data экономит GET)
+        await state.set_data({
+            **data,
+            "current_question": 1,
+            "current_question_text": question,
+            # История хранится в БД; пустые списки лишь затирают хвосты прошлых сессий
+            "conversation_history": [],
+            "analysis_history": [],
+            "max_answer_length": 0,  # Самый длинный ответ (для achievement'ов)
+            "deep_streak": 0,  # Глубокие ответы подряд
+            "question_start_time": time.time(),  # Трекаем время на ответ
+            "db_user_id": db_user_id,
+            "db_session_id": db_session_id,  # Сохраняем ID сессии
+            "diagnostic_mode": diagnostic_mode,  # "demo" или "full"
+            "total_questions": total_questions,  # 3 или 10
+        })
+        
+        reset_answer_stats(user_id)  # Статистика ответов для gamification
         
         # Устанавливаем состояние ДО отправки вопроса, чтобы избежать race condition
         await state.set_state(DiagnosticStates.answering)
         
-        # Ставим таймер напоминания (5 минут)
-        db_user_id = data.get("db_user_id")
-        await start_reminder(db_user_id, db_session_id)
-        
         # Обновляем сообщение на вопрос
         await loading_msg.edit_text(
             f"1️⃣ <b>Вопрос 1/{total_questions}</b>\n\n{question}",
-            reply_markup=get_question_keyboard(show_skip=False)
+            reply_markup=QUESTION_KEYBOARD
         )
+        
+        # Ставим таймер напоминания (5 минут) — уже после показа вопроса
+        await start_reminder(db_user_id, db_session_id)
 
     except Exception as e:
         logger.error(f"Error starting diagnostic: {e}", exc_info=True)
@@ -585,43 +887,93 @@ async def start_diagnostic(callback: CallbackQuery, state: FSMContext, bot: Bot)
         )
 
 
+# Ответы на нетекстовые сообщения во время диагностики (один lookup по content_type)
+ANSWER_FORMAT_HINT = "Пожалуйста, напиши ответ текстом или запиши голосовое."
+_REJECT_TEMPLATES: dict[str, str] = {
+    ContentType.PHOTO: "📷 Картинки я пока не анализирую. " + ANSWER_FORMAT_HINT,
+    ContentType.STICKER: "😄 Классный стикер! Но для анализа нужен ответ словами. " + ANSWER_FORMAT_HINT,
+    ContentType.ANIMATION: "🎞 Гифки я пока не анализирую. " + ANSWER_FORMAT_HINT,
+    ContentType.DOCUMENT: "📎 Файлы я пока не читаю. " + ANSWER_FORMAT_HINT,
+    ContentType.VIDEO: "🎬 Видео я пока не анализирую. " + ANSWER_FORMAT_HINT,
+    ContentType.VIDEO_NOTE: "🎥 Кружочки я пока не анализирую. " + ANSWER_FORMAT_HINT,
+    ContentType.CONTACT: "📇 Контакт не подойдёт как ответ. " + ANSWER_FORMAT_HINT,
+    ContentType.LOCATION: "📍 Геолокация не подойдёт как ответ. " + ANSWER_FORMAT_HINT,
+}
+
+
+async def _validate_answer(message: Message) -> str | None:
+    """
+    Общая проверка ответа для ввода и редактирования черновика.
+
+    Returns:
+        Текст ответа или None — тогда подсказка юзеру уже отправлена
+    """
+    reject_text = _REJECT_TEMPLATES.get(message.content_type)
+    if reject_text:
+        await message.answer(reject_text)
+        return None
+    if not message.text and not message.voice:
+        await message.answer(ANSWER_FORMAT_HINT)
+        return None
+    
+    # Проверяем длину ответа (если текст)
+    if message.text and len(message.text) < 10:
+        await message.answer("Слишком короткий ответ. Расскажи чуть подробнее, пожалуйста.")
+        return None
+    
+    return message.text if message.text else "[Голосовое сообщение]"
+
+
 @router.message(DiagnosticStates.answering)
 async def handle_answer(message: Message, state: FSMContext, bot: Bot):
     """Обработка ответа пользователя."""
     logger.info(f"handle_answer triggered for {message.from_user.id}")
-    data = await state.get_data()
     
-    # Валидация
-    if not message.text and not message.voice:
-        await message.answer("Пожалуйста, напиши ответ текстом или запиши голосовое.")
+    # Валидация (до чтения стейта — отказ не трогает хранилище)
+    answer_text = await _validate_answer(message)
+    if answer_text is None:
         return
         
-    answer_text = message.text if message.text else "[Голосовое сообщение]"
-    
-    # Проверяем длину ответа (если текст)
-    if message.text and len(message.text) < 10:
-        await message.answer("Слишком короткий ответ. Расскажи чуть подробнее, пожалуйста.")
-        return
+    data = await state.get_data()
 
     # Сохраняем черновик ответа и показываем меню подтверждения
-    await state.update_data(draft_answer=answer_text)
+    # (data уже прочитан — set_data вместо update_data экономит GET)
+    await state.set_data({**data, "draft_answer": answer_text})
     
     # Удаляем таймер, пока юзер думает
     db_session_id = data.get("db_session_id")
     user_id = message.from_user.id
-    if db_session_id:
-        await cancel_reminder(db_session_id)
+    fire_cancel_reminder(db_session_id)
 
     await message.answer(
         f"<b>Твой ответ:</b>\n\n{answer_text}\n\nОтправляем или хочешь дополнить?",
-        reply_markup=get_confirm_answer_keyboard()
+        reply_markup=CONFIRM_ANSWER_KEYBOARD
     )
     await state.set_state(DiagnosticStates.confirming_answer)
 
 
+# Юзеры, чей ответ сейчас обрабатывается (защита от двойного нажатия «Отправить»)
+_confirming_users: set[int] = set()
+
+
 @router.callback_query(DiagnosticStates.confirming_answer, F.data == "confirm_answer")
 async def confirm_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
     """Подтверждение ответа — переход к следующему вопросу."""
+    user_id = callback.from_user.id
+    # Проверка и отметка без await между ними — второй клик не проскочит
+    if user_id in _confirming_users:
+        await callback.answer("⏳ Уже обрабатываю ответ...")
+        return
+    _confirming_users.add(user_id)
+    try:
+        await _process_confirmed_answer(callback, state, bot)
+    finally:
+        _confirming_users.discard(user_id)
+        _processing_notice_at.pop(user_id, None)  # Обработка закончилась — троттлинг не нужен
+
+
+async def _process_confirmed_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
+    """Анализ подтверждённого ответа и выдача следующего вопроса."""
     logger.info(f"DEBUG: Entering confirm_answer for {callback.from_user.id}")
     try:
         await callback.answer()
@@ -641,37 +993,73 @@ async def confirm_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
     data = await state.get_data()
     answer_text = data.get("draft_answer")
     current_q = data.get("current_question", 1)
-    history = data.get("conversation_history", [])
-    analysis_history = data.get("analysis_history", [])
     question_text = data.get("current_question_text")
-    answer_stats = data.get("answer_stats", [])
+    user_id = callback.from_user.id
+    prev_max_length = data.get("max_answer_length", 0)
+    prev_deep_streak = data.get("deep_streak", 0)
     start_time = data.get("question_start_time", time.time())
     db_session_id = data.get("db_session_id")
     diagnostic_mode = data.get("diagnostic_mode", "full")
     total_questions = data.get("total_questions", FULL_QUESTIONS)
     
-    duration = time.time() - start_time
+    # question_start_time лежит в FSM (Redis) и переживает рестарт/переезд бота,
+    # поэтому это wall-clock; отрицательную длительность после коррекции часов отсекаем
+    duration = max(0.0, time.time() - start_time)
+    next_q_num = current_q + 1
+    next_question_task: asyncio.Task | None = None
+    is_retry = False
     
     try:
-        # 1. Анализируем ответ
+        turn = {
+            "question": question_text,
+            "answer": answer_text
+        }
+        
+        # 1. История живёт в БД, в FSM её не гоняем
+        if db_session_id:
+            # Предыдущий ответ мог ещё писаться в фоне
+            await flush_pending_writes(db_session_id)
+            async with get_session() as db:
+                history, analysis_history = await get_session_histories(db, db_session_id)
+            # Повтор после ошибки: этот ход уже мог лечь в БД — берём историю
+            # только до текущего вопроса, иначе ответ и анализ задвоятся
+            is_retry = len(history) >= current_q or len(analysis_history) >= current_q
+            del history[current_q - 1:]
+            del analysis_history[current_q - 1:]
+        else:
+            # Без сессии в БД (не должно случаться) — история только в FSM
+            history = list(data.get("conversation_history", []))
+            analysis_history = list(data.get("analysis_history", []))
+        history.append(turn)
+        
+        # 2. Следующий вопрос генерируем параллельно с анализом текущего ответа:
+        # генератор видит сам ответ и анализы прошлых вопросов, текущий анализ не ждём
+        if current_q < total_questions:
+            next_question_task = asyncio.create_task(generate_question(
+                role=data["role"],
+                role_name=data.get("role_name", "Специалист"), # Fallback если нет имени роли
+                experience=data["experience"],
+                question_number=next_q_num,
+                conversation_history=list(history),
+                analysis_history=list(analysis_history)
+            ))
+        
+        # 3. Анализируем ответ
         analysis = await analyze_answer(question_text, answer_text, data["role"])
         
-        # Обновляем статистику
+        # Обновляем статистику (только числа — баллы уже лежат в analysis_history)
+        answer_len = len(answer_text)
         stats_entry = {
             "question": current_q,
-            "length": len(answer_text),
+            "length": answer_len,
             "duration_sec": int(duration),
-            "scores": analysis.get("scores", {}),
         }
-        answer_stats.append(stats_entry)
+        # Копия с новой записью: в память кладём только после успешного шага
+        answer_stats = _answer_stats.get(user_id, []) + [stats_entry]
+        # Глубокие ответы подряд (сбрасывается на коротком ответе)
+        deep_streak = prev_deep_streak + 1 if answer_len > 300 else 0
         
-        # Сохраняем в историю
-        history.append({
-            "question": question_text,
-            "answer": answer_text
-        })
-        
-        # Сохраняем анализ (только важные поля)
+        # Анализ храним только по важным полям
         analysis_history.append({
             "question": current_q,
             "scores": analysis.get("scores", {}),
@@ -679,71 +1067,66 @@ async def confirm_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
             "topics": analysis.get("topics", [])
         })
         
-        # Сохраняем в БД
+        # Сохраняем в БД (в фоне — дожидаемся перед следующим чтением/завершением)
         if db_session_id:
-            async with get_session() as db:
-                # Сохраняем ответ
-                await save_answer(
-                    db, 
-                    db_session_id, 
-                    current_q, 
-                    question_text, 
-                    answer_text, 
-                    analysis
-                )
-                
-                # Обновляем прогресс сессии
-                await update_session_progress(
-                    db,
-                    db_session_id,
-                    current_q,
-                    history,
-                    analysis_history
-                )
+            schedule_answer_persist(
+                db_session_id,
+                current_q,
+                question_text,
+                answer_text,
+                analysis,
+                history,
+                analysis_history,
+                replace=is_retry,
+            )
         
         # Показываем прогресс и feedback
         progress_msg = generate_progress_message(
             current_q, 
             total_questions, 
             answer_stats, 
-            answer_text
+            answer_text,
+            prev_max_length=prev_max_length,
+            deep_streak=deep_streak,
         )
         
         # Редактируем сообщение с анализом на сообщение с прогрессом
         await processing_msg.edit_text(progress_msg)
         
         # Если это был последний вопрос
-        if current_q >= total_questions:
+        if next_question_task is None:
+            discard_answer_stats(user_id)
             await finish_diagnostic(callback.message, state, data, history, analysis_history, answer_stats)
             return
             
-        # 2. Генерируем следующий вопрос
-        await safe_send_chat_action(bot, callback.message.chat.id, ChatAction.TYPING)
-        
-        next_q_num = current_q + 1
-        next_question = await generate_question(
-            role=data["role"],
-            role_name=data.get("role_name", "Специалист"), # Fallback если нет имени роли
-            experience=data["experience"],
-            question_number=next_q_num,
-            conversation_history=history,
-            analysis_history=analysis_history
-        )
+        # 4. Забираем следующий вопрос (обычно уже готов)
+        if not next_question_task.done():
+            fire_chat_action(bot, callback.message.chat.id)
+        try:
+            next_question = await asyncio.wait_for(next_question_task, timeout=NEXT_QUESTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Генерация зависла — не держим юзера, отдаём запасной вопрос
+            logger.warning(f"Next question timed out for {user_id}, using fallback")
+            next_question = get_fallback_question(data["role"], next_q_num)
         
-        # Обновляем стейт
-        await state.update_data(
+        # Обновляем стейт (история — в БД, в FSM только без db_session_id)
+        state_update = dict(
             current_question=next_q_num,
             current_question_text=next_question,
-            conversation_history=history,
-            analysis_history=analysis_history,
-            answer_stats=answer_stats,
+            max_answer_length=max(prev_max_length, answer_len),
+            deep_streak=deep_streak,
             question_start_time=time.time(),
         )
+        if not db_session_id:
+            state_update.update(conversation_history=history, analysis_history=analysis_history)
+        # data прочитан в начале хендлера — одна запись set_data без повторного GET
+        await state.set_data({**data, **state_update})
+        _answer_stats[user_id] = answer_stats
         
         # Отправляем вопрос
         await callback.message.answer(
             f"{next_q_num}️⃣ <b>Вопрос {next_q_num}/{total_questions}</b>\n\n{next_question}",
-            reply_markup=get_question_keyboard(show_skip=False)
+            reply_markup=QUESTION_KEYBOARD
         )
         
         # Снова ставим таймер
@@ -752,14 +1135,21 @@ async def confirm_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
         
         await state.set_state(DiagnosticStates.answering)
         
+    except asyncio.CancelledError:
+        # Хендлер отменили — генерация следующего вопроса больше не нужна
+        if next_question_task is not None:
+            next_question_task.cancel()
+        raise
     except Exception as e:
         logger.error(f"Error processing answer: {e}", exc_info=True)
+        if next_question_task is not None:
+            next_question_task.cancel()
         # Возвращаем клавиатуру подтверждения, чтобы юзер мог повторить
-        data = await state.get_data()
-        draft = data.get("draft_answer", "")
+        # (черновик уже прочитан в начале хендлера — повторно в хранилище не ходим)
+        draft = answer_text or ""
         await callback.message.answer(
             f"<b>Твой ответ:</b>\n\n{draft}\n\n❌ Произошла ошибка при анализе. Попробуем еще раз?",
-            reply_markup=get_confirm_answer_keyboard()
+            reply_markup=CONFIRM_ANSWER_KEYBOARD
         )
         # State остается confirming_answer
 
@@ -767,13 +1157,41 @@ async def confirm_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
 @router.message(DiagnosticStates.confirming_answer)
 async def handle_text_during_confirmation(message: Message, state: FSMContext):
     """Если юзер пишет текст во время подтверждения — считаем это редактированием."""
-    await state.update_data(draft_answer=message.text)
+    answer_text = await _validate_answer(message)
+    if answer_text is None:
+        return  # Черновик остаётся прежним
+    
+    await state.update_data(draft_answer=answer_text)
     await message.answer(
-        f"<b>Твой новый ответ:</b>\n\n{message.text}\n\nОтправляем?",
-        reply_markup=get_confirm_answer_keyboard()
+        f"<b>Твой новый ответ:</b>\n\n{answer_text}\n\nОтправляем?",
+        reply_markup=CONFIRM_ANSWER_KEYBOARD
     )
 
 
+# Как часто можно напоминать «подожди», если юзер пишет во время обработки
+PROCESSING_NOTICE_INTERVAL = 5.0
+# telegram_id -> время последнего напоминания
+_processing_notice_at: dict[int, float] = {}
+
+
+@router.message(DiagnosticStates.starting)
+@router.message(DiagnosticStates.processing_answer)
+@router.message(DiagnosticStates.generating_report)
+async def ignore_message_while_processing(message: Message):
+    """
+    Сообщения, пока бот готовит вопрос или отчёт.
+
+    Иначе их подхватывает catch-all (с походом в БД). Отвечаем не чаще
+    раза в PROCESSING_NOTICE_INTERVAL секунд, чтобы не спамить чат.
+    """
+    now = time.monotonic()
+    user_id = message.from_user.id
+    if now - _processing_notice_at.get(user_id, 0.0) < PROCESSING_NOTICE_INTERVAL:
+        return
+    _processing_notice_at[user_id] = now
+    await message.answer("⏳ Секунду, я ещё думаю...")
+
+
 @router.callback_query(F.data == "pause_session")
 async def pause_session(callback: CallbackQuery, state: FSMContext):
     """Приостановка диагностики."""
@@ -786,6 +1204,7 @@ async def pause_session(callback: CallbackQuery, state: FSMContext):
     
     # Сбрасываем стейт, но данные в БД остаются
     await state.clear()
+    discard_answer_stats(callback.from_user.id)
 
 
 @router.callback_query(DiagnosticStates.confirming_answer, F.data == "edit_answer")
@@ -800,8 +1219,7 @@ async def finish_diagnostic(message: Message, state: FSMContext, data: dict, his
     # Удаляем таймеры
     db_session_id = data.get("db_session_id")
     user_id = message.from_user.id
-    if db_session_id:
-        await cancel_reminder(db_session_id)
+    fire_cancel_reminder(db_session_id)
         
     await message.answer(
         "🎉 <b>Поздравляю! Диагностика завершена.</b>\n\n"
@@ -819,110 +1237,101 @@ async def finish_diagnostic(message: Message, state: FSMContext, data: dict, his
         # Калибровка (чтобы не было завышенных/заниженных)
         scores = calibrate_scores(scores, data["experience"])
         
-        # Обновляем прогресс
-        await report_msg.edit_text("⏳ <b>Генерирую отчет...</b>\n\n<code>▓▓▓▓░░░░░░</code> 40%\n<i>Считаю метрики...</i>")
+        # Демо: подробный AI-отчёт не показываем (он за paywall) — не тратим
+        # на него минуты стриминга и токены, хватает баллов и ачивок
+        is_demo = data.get("diagnostic_mode") == "demo"
+        if is_demo:
+            report_text = ""
+        else:
+            # Обновляем прогресс
+            await report_msg.edit_text("⏳ <b>Генерирую отчет...</b>\n\n<code>▓▓▓▓░░░░░░</code> 40%\n<i>Считаю метрики...</i>")
         
-        # Генерация текста отчета (Streaming)
-        report_text = ""
-        chunk_count = 0
-        last_update_time = time.time()
+            # Генерация текста отчета (Streaming)
+            # Прогресс — по реальным разделам отчёта, а не по таймеру
+            report_text = ""
+            section_num = 0
+            section_title = ""
+            shown_progress = ""
+            last_update_time = time.monotonic()
         
-        try:
-            async for chunk in stream_detailed_report(
-                role=data["role"],
-                role_name=data["role_name"],
-                experience=data["experience"],
-                conversation_history=history,
-                analysis_history=analysis_history
-            ):
-                report_text += chunk
-                chunk_count += 1
-                
-                # Обновляем статус раз в 2 секунды, чтобы не словить FloodWait
-                current_time = time.time()
-                if current_time - last_update_time > 2.0:
-                    # Эмулируем прогресс от 40% до 90%
-                    # Предполагаем средний отчет 3000 символов
-                    estimated_pct = min(40 + int((len(report_text) / 3000) * 50), 90)
-                    filled = int(estimated_pct / 10)
-                    bar = "▓" * filled + "░" * (10 - filled)
-                    
-                    status_variations = [
-                        "<i>Пишу введение...</i>",
-                        "<i>Анализирую сильные стороны...</i>",
-                        "<i>Формулирую рекомендации...</i>",
-                        "<i>Подбираю слова...</i>",
-                        "<i>Оформляю выводы...</i>"
-                    ]
-                    status_text = status_variations[chunk_count % len(status_variations)]
-                    
-                    try:
-                        await report_msg.edit_text(
-                            f"⏳ <b>Генерирую отчет...</b>\n\n<code>{bar}</code> {estimated_pct}%\n{status_text}"
-                        )
-                        last_update_time = current_time
-                    except Exception:
-                        pass # Игнорируем ошибки редактирования (например, если текст не изменился)
-                        
-        except Exception as e:
-            logger.error(f"Streaming failed, falling back: {e}")
-            if not report_text:
-                # Если стриминг упал сразу, пробуем обычный метод или fallback
-                report_text = await generate_detailed_report(
+            try:
+                async for chunk in stream_detailed_report(
                     role=data["role"],
                     role_name=data["role_name"],
                     experience=data["experience"],
                     conversation_history=history,
-                    analysis_history=analysis_history
-                )
+                    analysis_history=analysis_history,
+                    scores=scores,
+                ):
+                    report_text += chunk
+                    
+                    # Заголовок ищем только в хвосте: он мог разрезаться между чанками
+                    scan_from = max(0, len(report_text) - len(chunk) - REPORT_SECTION_LOOKBACK)
+                    for match in REPORT_SECTION_RE.finditer(report_text, scan_from):
+                        section_num, section_title = int(match.group(1)), match.group(2)
+                    
+                    if section_num:
+                        pct = min(40 + 50 * (section_num - 1) // REPORT_SECTIONS, 90)
+                        status_text = f"<i>{section_num}/{REPORT_SECTIONS}: {section_title.strip().capitalize()}...</i>"
+                    else:
+                        # Модель не пронумеровала разделы — оцениваем по объёму (~3000 символов)
+                        pct = min(40 + len(report_text) * 50 // 3000, 90)
+                        status_text = "<i>Пишу отчёт...</i>"
+                    progress_text = (
+                        f"⏳ <b>Генерирую отчет...</b>\n\n"
+                        f"<code>{REPORT_PROGRESS_BARS[pct // 10]}</code> {pct}%\n{status_text}"
+                    )
+                    
+                    # Редактируем только при смене прогресса и не чаще раза в 2 секунды (FloodWait)
+                    current_time = time.monotonic()
+                    if progress_text != shown_progress and current_time - last_update_time > 2.0:
+                        try:
+                            await report_msg.edit_text(progress_text)
+                            shown_progress = progress_text
+                            last_update_time = current_time
+                        except TelegramRetryAfter as e:
+                            # Telegram попросил подождать — не трогаем сообщение до конца паузы,
+                            # стрим при этом продолжаем читать
+                            last_update_time = current_time + e.retry_after
+                        except Exception:
+                            pass # Игнорируем ошибки редактирования
+                        
+            except Exception as e:
+                logger.error(f"Streaming failed, falling back: {e}")
+                if not report_text:
+                    # Если стриминг упал сразу, пробуем обычный метод или fallback
+                    report_text = await generate_detailed_report(
+                        role=data["role"],
+                        role_name=data["role_name"],
+                        experience=data["experience"],
+                        conversation_history=history,
+                        analysis_history=analysis_history,
+                        scores=scores,
+                    )
 
-        logger.info(f"Report generated. Length: {len(report_text)}")
+            logger.info(f"Report generated. Length: {len(report_text)}")
         
-        await report_msg.edit_text("⏳ <b>Генерирую отчет...</b>\n\n<code>▓▓▓▓▓▓▓▓░░</code> 95%\n<i>Финальные штрихи...</i>")
+            await report_msg.edit_text("⏳ <b>Генерирую отчет...</b>\n\n<code>▓▓▓▓▓▓▓▓░░</code> 95%\n<i>Финальные штрихи...</i>")
         
         # Сохраняем результаты в БД
         benchmark_summary = ""
         if db_session_id:
-            async with get_session() as db:
-                await complete_session(
-                    db,
-                    db_session_id,
-                    scores,
-                    report_text,
-                    history,
-                    analysis_history
-                )
-                
-                # Q1 1.4: Real-time Benchmarking
-                try:
-                    # Получаем бенчмарк
-                    benchmark_res = await get_benchmark(
-                        session=db,
-                        user_score=scores['total'],
-                        role=data["role"],
-                        role_name=data["role_name"],
-                        experience=data["experience"],
-                        experience_name=data.get("experience_name", data["experience"]),
-                    )
-                    
-                    if benchmark_res.has_enough_data:
-                        best_pct, group = benchmark_res.get_best_percentile()
-                        # Формируем краткую строку для саммари
-                        benchmark_summary = f"\n📊 <b>Топ-{100 - best_pct}%</b> среди {group}"
-                        
-                        # Также можно добавить инсайт, если он есть
-                        if benchmark_res.insights:
-                            benchmark_summary += f"\n<i>{benchmark_res.insights[0]}</i>"
-                            
-                except Exception as e:
-                    logger.error(f"Failed to get benchmark: {e}")
+            # Все ответы должны лечь в БД до завершения сессии
+            await flush_pending_writes(db_session_id)
+            # Завершение сессии не должно обрываться отменой хендлера;
+            # бенчмарк считаем в той же сессии БД, без второго захода в пул
+            benchmark_summary = await asyncio.shield(_finalize_session(
+                db_session_id,
+                scores,
+                report_text,
+                history,
+                analysis_history,
+                data,
+            ))
         
         # Добавляем ачивки
         achievements = generate_final_achievements(answer_stats)
         
-        # Отправляем отчет (разбиваем, если длинный)
-        await report_msg.delete()
-        
         # Красивое саммари перед отчетом
         summary = (
             f"✅ <b>Твой результат готов!</b>\n\n"
@@ -931,20 +1340,26 @@ async def finish_diagnostic(message: Message, state: FSMContext, data: dict, his
             f"Total Score: <b>{scores['total']}/100</b>"
             f"{benchmark_summary}\n"
             f"{achievements}\n\n"
-            f"👇 Твой подробный отчет ниже"
+            f"{DEMO_REPORT_TEASER if is_demo else '👇 Твой подробный отчет ниже'}"
         )
+        # В демо саммари — последнее сообщение, на нём и CTA
+        summary_markup = DEMO_RESULT_KEYBOARD if is_demo else None
         
-        await message.answer(summary)
-        
-        # Отправляем сам отчет
-        # Используем message_splitter для надежности
-        await send_long_message(message.bot, message.chat.id, report_text)
+        # Саммари встаёт на место сообщения с прогрессом (один edit вместо delete + send)
+        try:
+            await report_msg.edit_text(summary, reply_markup=summary_markup)
+        except TelegramBadRequest:
+            await message.answer(summary, reply_markup=summary_markup)
         
-        # Предлагаем следующие шаги
-        await message.answer(
-            "Что делать дальше?",
-            reply_markup=get_post_diagnostic_keyboard()
-        )
+        if not is_demo:
+            # Отправляем сам отчет (разбиваем, если длинный)
+            # Следующие шаги — в последней части отчета, без отдельного сообщения
+            await send_long_message(
+                message.bot,
+                message.chat.id,
+                f"{report_text}\n\n<b>Что делать дальше?</b>",
+                reply_markup=POST_DIAGNOSTIC_KEYBOARD,
+            )
         
         await state.clear()
         
@@ -957,12 +1372,7 @@ async def finish_diagnostic(message: Message, state: FSMContext, data: dict, his
             except:
                 scores = {'total': 0, 'hard_skills': 0, 'soft_skills': 0, 'thinking': 0, 'mindset': 0}
         
-        all_insights = []
-        all_gaps = []
-        if analysis_history:
-            for analysis in analysis_history:
-                all_insights.extend(analysis.get("key_insights", []))
-                all_gaps.extend(analysis.get("gaps", []))
+        all_insights, all_gaps = collect_insights_and_gaps(analysis_history or [])
 
         fallback_report = generate_fallback_report(
             role_name=data.get("role_name", "Specialist"),
@@ -973,7 +1383,7 @@ async def finish_diagnostic(message: Message, state: FSMContext, data: dict, his
         )
         await message.answer(
             f"Не удалось сгенерировать полный отчет, но вот твои баллы:\n\n{fallback_report}",
-            reply_markup=get_post_diagnostic_keyboard()
+            reply_markup=POST_DIAGNOSTIC_KEYBOARD
         )
         await state.clear()
 
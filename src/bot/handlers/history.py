@@ -1,10 +1,12 @@
 """
 Обработчик команды /history — просмотр прошлых диагностик.
 """
+import asyncio
 import logging
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.filters import Command
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.enums import ChatAction
 
 from src.db import get_session
@@ -16,13 +18,14 @@ from src.db.repositories import (
     get_user_stats,
 )
 from src.utils.pdf_generator import generate_pdf_report
-from src.utils.message_splitter import send_with_continuation
+from src.utils.message_splitter import send_with_continuation, MAX_MESSAGE_LENGTH
 from src.bot.keyboards.inline import (
     get_back_to_menu_keyboard,
     get_after_share_keyboard,
     get_result_summary_keyboard,
     get_history_keyboard,
 )
+from src.bot.keyboards.reply import get_accessibility_hint
 from src.analytics import (
     build_profile, format_profile_text, 
     get_benchmark, format_benchmark_text,
@@ -30,7 +33,7 @@ from src.analytics import (
     build_pdp, format_pdp_text,
     calculate_user_dynamics, format_dynamics_text, format_session_card,
 )
-from src.ai.answer_analyzer import calculate_category_scores, calibrate_scores
+from src.ai.answer_analyzer import calculate_category_scores, calibrate_scores, get_metric_name_ru
 from src.ai.report_gen import split_message
 
 router = Router(name="history")
@@ -124,8 +127,6 @@ async def cmd_help(message: Message):
 @router.message(Command("accessibility"))
 async def cmd_accessibility(message: Message):
     """Показать подсказки по доступности."""
-    from src.bot.keyboards.reply import get_accessibility_hint
-    
     accessibility_text = f"""
 ♿ <b>Настройки доступности</b>
 
@@ -162,6 +163,28 @@ async def cmd_accessibility(message: Message):
 
 from src.bot.handlers.payments import show_paywall
 
+def _build_profile_text(
+    role: str,
+    role_name: str,
+    experience: str,
+    experience_name: str,
+    analysis_history: list[dict],
+) -> str:
+    """Текст профиля компетенций (чистый CPU, вызывается в отдельном потоке)."""
+    raw_scores = calculate_category_scores(analysis_history)
+    scores = calibrate_scores(raw_scores, experience)
+    
+    profile = build_profile(
+        role=role,
+        role_name=role_name,
+        experience=experience,
+        experience_name=experience_name,
+        scores=scores,
+        analysis_history=analysis_history,
+    )
+    return format_profile_text(profile)
+
+
 @router.message(Command("profile"))
 async def cmd_profile(message: Message):
     """Показать профиль компетенций из последней диагностики."""
@@ -202,22 +225,16 @@ async def cmd_profile(message: Message):
                 )
                 return
             
-            # Рассчитываем scores
-            raw_scores = calculate_category_scores(analysis_history)
-            scores = calibrate_scores(raw_scores, session.experience)
-            
-            # Строим профиль
-            profile = build_profile(
+            # Считаем баллы и строим профиль в потоке — не блокируем event loop
+            profile_text = await asyncio.to_thread(
+                _build_profile_text,
                 role=session.role,
                 role_name=session.role_name,
                 experience=session.experience,
                 experience_name=session.experience_name,
-                scores=scores,
                 analysis_history=analysis_history,
             )
             
-            profile_text = format_profile_text(profile)
-            
             # Отправляем по частям если длинный
             parts = split_message(profile_text, max_length=3500)
             for part in parts:
@@ -297,6 +314,41 @@ async def cmd_progress(message: Message):
         await message.answer("❌ Не удалось загрузить прогресс. Попробуй позже.")
 
 
+def _build_pdp_text(
+    role: str,
+    role_name: str,
+    experience: str,
+    experience_name: str,
+    total_score: int,
+    analysis_history: list[dict],
+) -> str:
+    """Текст плана развития (чистый CPU, вызывается в отдельном потоке)."""
+    raw_scores = calculate_category_scores(analysis_history)
+    calibrated = calibrate_scores(raw_scores, experience)
+    
+    # Строим профиль для strengths
+    profile = build_profile(
+        role=role,
+        role_name=role_name,
+        experience=experience,
+        experience_name=experience_name,
+        scores=calibrated,
+        analysis_history=analysis_history,
+    )
+    
+    # Строим PDP
+    pdp = build_pdp(
+        role=role,
+        role_name=role_name,
+        experience=experience,
+        experience_name=experience_name,
+        total_score=total_score,
+        raw_averages=calibrated.get("raw_averages", {}),
+        strengths=profile.strengths,
+    )
+    return format_pdp_text(pdp)
+
+
 @router.message(Command("pdp"))
 async def cmd_pdp(message: Message):
     """Показать персональный план развития."""
@@ -338,34 +390,17 @@ async def cmd_pdp(message: Message):
                 )
                 return
             
-            # Рассчитываем scores
-            raw_scores = calculate_category_scores(analysis_history)
-            calibrated = calibrate_scores(raw_scores, session.experience)
-            
-            # Строим профиль для strengths
-            profile = build_profile(
-                role=session.role,
-                role_name=session.role_name,
-                experience=session.experience,
-                experience_name=session.experience_name,
-                scores=calibrated,
-                analysis_history=analysis_history,
-            )
-            
-            # Строим PDP
-            raw_averages = calibrated.get("raw_averages", {})
-            pdp = build_pdp(
+            # Профиль + PDP — чистый CPU, считаем в потоке
+            pdp_text = await asyncio.to_thread(
+                _build_pdp_text,
                 role=session.role,
                 role_name=session.role_name,
                 experience=session.experience,
                 experience_name=session.experience_name,
                 total_score=session.total_score or 0,
-                raw_averages=raw_averages,
-                strengths=profile.strengths,
+                analysis_history=analysis_history,
             )
             
-            pdp_text = format_pdp_text(pdp)
-            
             # Отправляем по частям если длинный
             parts = split_message(pdp_text, max_length=3800)
             for part in parts:
@@ -388,12 +423,102 @@ async def cmd_pdp(message: Message):
         await message.answer("❌ Не удалось загрузить план развития. Попробуй позже.")
 
 
+def _build_pdf_analytics(
+    role: str,
+    role_name: str,
+    experience: str,
+    experience_name: str,
+    total_score: int,
+    analysis_history: list[dict],
+) -> tuple[dict | None, dict | None, dict | None]:
+    """
+    Профиль и PDP для PDF (чистый CPU, вызывается в отдельном потоке).
+
+    Returns:
+        (profile_data, pdp_data, raw_averages)
+    """
+    profile_data = None
+    pdp_data = None
+    raw_averages = None
+    
+    if not analysis_history:
+        return profile_data, pdp_data, raw_averages
+    
+    try:
+        raw_scores = calculate_category_scores(analysis_history)
+        calibrated = calibrate_scores(raw_scores, experience)
+        raw_averages = calibrated.get("raw_averages", {})
+        
+        profile = build_profile(
+            role=role,
+            role_name=role_name,
+            experience=experience,
+            experience_name=experience_name,
+            scores=calibrated,
+            analysis_history=analysis_history,
+        )
+        # Преобразуем в dict для PDF
+        profile_data = {
+            "strengths": [get_metric_name_ru(s) for s in profile.strengths],
+            "growth_areas": [get_metric_name_ru(g) for g in profile.growth_areas],
+            "thinking_style": profile.thinking_style_description[:100] if profile.thinking_style_description else "",
+            "communication_style": profile.communication_style_description[:100] if profile.communication_style_description else "",
+        }
+        
+        # Строим PDP (зависит от сильных сторон профиля)
+        pdp = build_pdp(
+            role=role,
+            role_name=role_name,
+            experience=experience,
+            experience_name=experience_name,
+            total_score=total_score,
+            raw_averages=raw_averages,
+            strengths=profile.strengths,
+        )
+        
+        # Преобразуем PDP в dict для PDF
+        pdp_data = {
+            "main_focus": pdp.main_focus,
+            "primary_goals": [
+                {
+                    "metric_name": g.metric_name,
+                    "current_score": g.current_score,
+                    "target_score": g.target_score,
+                    "priority_reason": g.priority_reason,
+                    "actions": g.actions,
+                    "resources": [{"type": r.type, "title": r.title} for r in g.resources]
+                }
+                for g in pdp.primary_goals
+            ],
+            "plan_30_days": pdp.plan_30_days,
+            "success_metrics": pdp.success_metrics,
+            "motivation_message": pdp.motivation_message,
+        }
+        
+    except Exception as e:
+        logger.warning(f"Failed to build profile/PDP for PDF: {e}")
+    
+    return profile_data, pdp_data, raw_averages
+
+
+async def _fetch_pdf_benchmark(db, **kwargs) -> dict | None:
+    """Бенчмарк для PDF (None, если данных мало или запрос упал)."""
+    # Q1 1.4: Real-time Benchmarking integration
+    try:
+        benchmark_res = await get_benchmark(session=db, **kwargs)
+        if benchmark_res.has_enough_data:
+            return benchmark_res.to_dict()
+    except Exception as e:
+        logger.warning(f"Failed to fetch benchmark for PDF: {e}")
+    return None
+
+
 @router.callback_query(F.data.startswith("pdf:"))
 async def process_pdf_download(callback: CallbackQuery):
     """Генерация и отправка PDF-отчёта."""
     await callback.answer("📄 Генерирую PDF...")
     
-    session_id = int(callback.data.split(":")[1])
+    session_id = int(callback.data.rpartition(":")[2])
     
     try:
         async with get_session() as db:
@@ -425,83 +550,26 @@ async def process_pdf_download(callback: CallbackQuery):
             report_text = diagnostic_session.report or "Отчёт недоступен"
             analysis_history = diagnostic_session.analysis_history or []
             
-            # Строим профиль, PDP и бенчмарк для PDF
-            profile_data = None
-            pdp_data = None
-            benchmark_data = None
-            raw_averages = None
-            
-            if analysis_history:
-                try:
-                    raw_scores = calculate_category_scores(analysis_history)
-                    calibrated = calibrate_scores(raw_scores, diagnostic_session.experience)
-                    raw_averages = calibrated.get("raw_averages", {})
-                    
-                    profile = build_profile(
-                        role=diagnostic_session.role,
-                        role_name=diagnostic_session.role_name,
-                        experience=diagnostic_session.experience,
-                        experience_name=diagnostic_session.experience_name,
-                        scores=calibrated,
-                        analysis_history=analysis_history,
-                    )
-                    # Преобразуем в dict для PDF
-                    from src.ai.answer_analyzer import METRIC_NAMES_RU
-                    profile_data = {
-                        "strengths": [METRIC_NAMES_RU.get(s, s) for s in profile.strengths],
-                        "growth_areas": [METRIC_NAMES_RU.get(g, g) for g in profile.growth_areas],
-                        "thinking_style": profile.thinking_style_description[:100] if profile.thinking_style_description else "",
-                        "communication_style": profile.communication_style_description[:100] if profile.communication_style_description else "",
-                    }
-                    
-                    # Строим PDP
-                    pdp = build_pdp(
-                        role=diagnostic_session.role,
-                        role_name=diagnostic_session.role_name,
-                        experience=diagnostic_session.experience,
-                        experience_name=diagnostic_session.experience_name,
-                        total_score=diagnostic_session.total_score or 0,
-                        raw_averages=raw_averages,
-                        strengths=profile.strengths,
-                    )
-                    
-                    # Преобразуем PDP в dict для PDF
-                    pdp_data = {
-                        "main_focus": pdp.main_focus,
-                        "primary_goals": [
-                            {
-                                "metric_name": g.metric_name,
-                                "current_score": g.current_score,
-                                "target_score": g.target_score,
-                                "priority_reason": g.priority_reason,
-                                "actions": g.actions,
-                                "resources": [{"type": r.type, "title": r.title} for r in g.resources]
-                            }
-                            for g in pdp.primary_goals
-                        ],
-                        "plan_30_days": pdp.plan_30_days,
-                        "success_metrics": pdp.success_metrics,
-                        "motivation_message": pdp.motivation_message,
-                    }
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to build profile/PDP for PDF: {e}")
-
-            # Q1 1.4: Real-time Benchmarking integration
-            try:
-                benchmark_res = await get_benchmark(
-                    session=db,
+            # Строим профиль и PDP (CPU — в потоке) параллельно с бенчмарком (БД)
+            (profile_data, pdp_data, raw_averages), benchmark_data = await asyncio.gather(
+                asyncio.to_thread(
+                    _build_pdf_analytics,
+                    role=diagnostic_session.role,
+                    role_name=diagnostic_session.role_name,
+                    experience=diagnostic_session.experience,
+                    experience_name=diagnostic_session.experience_name,
+                    total_score=diagnostic_session.total_score or 0,
+                    analysis_history=analysis_history,
+                ),
+                _fetch_pdf_benchmark(
+                    db,
                     user_score=scores['total'],
                     role=diagnostic_session.role,
                     role_name=diagnostic_session.role_name,
                     experience=diagnostic_session.experience,
                     experience_name=diagnostic_session.experience_name,
-                )
-                
-                if benchmark_res.has_enough_data:
-                    benchmark_data = benchmark_res.to_dict()
-            except Exception as e:
-                logger.warning(f"Failed to fetch benchmark for PDF: {e}")
+                ),
+            )
             
             # Получаем имя пользователя
             user_name = callback.from_user.first_name or "Кандидат"
@@ -512,7 +580,9 @@ async def process_pdf_download(callback: CallbackQuery):
             status_msg = await callback.message.answer("⏳ Генерирую PDF-отчёт...")
             
             try:
-                pdf_bytes = generate_pdf_report(
+                # reportlab синхронный и тяжёлый — не блокируем event loop
+                pdf_bytes = await asyncio.to_thread(
+                    generate_pdf_report,
                     role_name=diagnostic_session.role_name,
                     experience=diagnostic_session.experience_name,
                     scores=scores,
@@ -559,14 +629,12 @@ async def process_share_card(callback: CallbackQuery, bot: Bot):
     """Генерация и отправка Share Card (PNG) для соцсетей."""
     await callback.answer("⏳ Рисую...", show_alert=False)
     
-    session_id = int(callback.data.split(":")[1])
+    session_id = int(callback.data.rpartition(":")[2])
     
     try:
         await bot.send_chat_action(callback.message.chat.id, ChatAction.UPLOAD_PHOTO)
         
         async with get_session() as db:
-            from src.db.repositories import get_session_by_id
-            
             diagnostic_session = await get_session_by_id(db, session_id)
             
             if not diagnostic_session:
@@ -577,8 +645,7 @@ async def process_share_card(callback: CallbackQuery, bot: Bot):
             await bot.send_chat_action(callback.message.chat.id, ChatAction.UPLOAD_PHOTO)
             
             try:
-                from src.utils.share_card import generate_share_card
-                from aiogram.types import BufferedInputFile
+                from src.utils.share_card import generate_share_card  # PIL грузим только по запросу
                 
                 # Собираем данные для карточки
                 category_scores = {
@@ -660,12 +727,23 @@ async def show_history_callback(callback: CallbackQuery, bot: Bot):
             dynamics = calculate_user_dynamics(sessions)
             dynamics_text = format_dynamics_text(dynamics)
             
+            history_keyboard = get_history_keyboard(sessions[0].id if sessions else None)
+            
+            # Короткая история помещается в одно сообщение — редактируем на месте,
+            # без разбиения и нового сообщения
+            if len(dynamics_text) <= MAX_MESSAGE_LENGTH:
+                try:
+                    await callback.message.edit_text(dynamics_text, reply_markup=history_keyboard)
+                    return
+                except TelegramBadRequest as e:
+                    logger.warning(f"History edit failed, sending new message: {e}")
+            
             # Отправляем новым сообщением (edit_text не подходит для длинных)
             await send_with_continuation(
                 bot=bot,
                 chat_id=callback.message.chat.id,
                 text=dynamics_text,
-                reply_markup=get_history_keyboard(sessions[0].id if sessions else None),
+                reply_markup=history_keyboard,
                 continuation_text="📊 <i>Продолжение истории...</i>",
             )
             
@@ -683,7 +761,7 @@ async def back_to_results(callback: CallbackQuery):
     await callback.answer()
     
     try:
-        session_id = int(callback.data.split(":")[1])
+        session_id = int(callback.data.rpartition(":")[2])
         
         async with get_session() as db:
             diagnostic_session = await get_session_by_id(db, session_id)
@@ -695,8 +773,6 @@ async def back_to_results(callback: CallbackQuery):
                 )
                 return
             
-            from src.bot.keyboards.inline import get_result_summary_keyboard
-            
             # Формируем summary card
             summary = (
                 f"📊 <b>Результаты диагностики</b>\n\n"
@@ -6,20 +6,26 @@ Callback buy:* — инициировать оплату
 pre_checkout_query — валидация перед оплатой
 successful_payment — обработка успешной оплаты
 """
+import html
 import logging
 from datetime import datetime
 
+from sqlalchemy import select
+
 from aiogram import Router, F, Bot
 from aiogram.types import (
     Message, 
     CallbackQuery, 
     PreCheckoutQuery,
     User,
+    InlineKeyboardButton,
 )
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 
 from src.db.session import get_session
+from src.db.models import Payment
 from src.db.repositories import balance_repo, get_or_create_user
 from src.payments.telegram_payments import (
     send_invoice,
@@ -38,6 +44,7 @@ from src.bot.keyboards.inline import (
     get_after_payment_keyboard,
     get_paywall_keyboard,
     get_direct_payment_keyboard,
+    get_balance_keyboard,
 )
 from src.services.yookassa_service import yookassa_service
 
@@ -176,9 +183,6 @@ async def show_pack_details(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Информация не найдена")
         return
 
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
-    from aiogram.types import InlineKeyboardButton
-    
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text=f"💳 Купить за {info['price']}", callback_data=f"confirm_buy:{pack_type}")
@@ -234,7 +238,6 @@ async def process_purchase(
     
     async with get_session() as session:
         # Гарантируем, что пользователь существует и получаем его внутренний ID
-        from src.db.repositories.user_repo import get_or_create_user
         user = await get_or_create_user(
             session, 
             telegram_id=user_id,
@@ -273,7 +276,6 @@ async def process_purchase(
             
             # Если это подписка — активируем
             if payment.pack_type == "subscription_1m":
-                 from src.db.repositories.subscription_repo import activate_subscription
                  await activate_subscription(session, internal_user_id, days=30)
             
             # Добавляем диагностики
@@ -387,9 +389,6 @@ async def handle_promo_input(message: Message, state: FSMContext):
         try:
             async with get_session() as session:
                 # 0. Гарантируем, что пользователь существует
-                from src.db.repositories.user_repo import get_or_create_user
-                from src.db.repositories.subscription_repo import activate_subscription
-                
                 # Используем данные из сообщения для создания/обновления пользователя
                 user = await get_or_create_user(
                     session, 
@@ -427,7 +426,6 @@ async def handle_promo_input(message: Message, state: FSMContext):
             )
             await state.clear()
         except Exception as e:
-            import html
             logger.error(f"GOD MODE ERROR: {e}", exc_info=True)
             # Экранируем текст ошибки, чтобы не сломать HTML-парсинг Telegram
             safe_error = html.escape(str(e))
@@ -437,7 +435,6 @@ async def handle_promo_input(message: Message, state: FSMContext):
 
     async with get_session() as session:
         # 0. Гарантируем, что пользователь существует и получаем его внутренний ID
-        from src.db.repositories.user_repo import get_or_create_user
         user = await get_or_create_user(
             session, 
             telegram_id=user_id,
@@ -551,7 +548,6 @@ async def successful_payment_handler(message: Message, state: FSMContext):
     
     async with get_session() as session:
         # Гарантируем, что пользователь существует и получаем его внутренний ID
-        from src.db.repositories.user_repo import get_or_create_user
         user = await get_or_create_user(
             session, 
             telegram_id=message.from_user.id,
@@ -590,7 +586,6 @@ async def successful_payment_handler(message: Message, state: FSMContext):
         
         # Если это подписка — активируем
         if payment.pack_type == "subscription_1m":
-             from src.db.repositories.subscription_repo import activate_subscription
              await activate_subscription(session, internal_user_id, days=30)
 
         # Добавляем диагностики на баланс
@@ -767,7 +762,6 @@ async def send_balance_info(tg_user: User, message: Message, is_edit: bool = Fal
     
     text += "\n\n━━━━━━━━━━━━━━━━━━━━"
     
-    from src.bot.keyboards.inline import get_balance_keyboard
     keyboard = get_balance_keyboard(count > 0)
 
     try:
@@ -805,9 +799,6 @@ async def check_payment_callback(callback: CallbackQuery, state: FSMContext):
     
     if status == "succeeded":
         async with get_session() as session:
-            from sqlalchemy import select
-            from src.db.models import Payment
-            
             result = await session.execute(
                 select(Payment).where(Payment.provider_payment_charge_id == yoo_payment_id)
             )
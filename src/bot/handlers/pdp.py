@@ -6,6 +6,7 @@
 - Кнопки: ✅ Сделано, ⏭️ Пропустить, 📝 Заметка
 - Прогресс и геймификация
 """
+import heapq
 import logging
 from datetime import datetime, timedelta
 from aiogram import Router, F, Bot
@@ -14,10 +15,11 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from sqlalchemy import update
 
-from src.db import get_session
+from src.db import get_session, PdpTask
 from src.db.repositories.user_repo import get_user_by_telegram_id
-from src.db.repositories.diagnostic_repo import get_completed_sessions
+from src.db.repositories.diagnostic_repo import get_completed_sessions, get_session_by_id
 from src.db.repositories.pdp_repo import (
     get_active_pdp_plan,
     create_pdp_plan,
@@ -34,6 +36,8 @@ from src.db.repositories.pdp_repo import (
     update_pdp_progress,
     get_or_create_reminder,
     update_reminder_settings,
+    update_pdp_reflection,
+    complete_pdp_plan,
 )
 from src.db.repositories.reminder_repo import schedule_task_reminder
 from src.analytics.pdp_generator import (
@@ -45,12 +49,15 @@ from src.analytics.pdp_generator import (
 )
 from src.utils.message_splitter import send_with_continuation
 from src.bot.handlers.payments import show_paywall
-from src.ai.answer_analyzer import calculate_category_scores
+from src.ai.answer_analyzer import calculate_category_scores, get_metric_name_ru
 
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Прогресс-бары на 10 делений (индекс = число закрашенных), строятся один раз
+PROGRESS_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
 
 # ==================== STATES ====================
 
@@ -317,7 +324,6 @@ async def choose_style_and_create(callback: CallbackQuery, state: FSMContext, bo
             return
         
         # Получаем данные сессии для определения фокуса
-        from src.db.repositories.diagnostic_repo import get_session_by_id
         session = await get_session_by_id(db, session_id)
         
         if not session or not session.analysis_history:
@@ -330,13 +336,9 @@ async def choose_style_and_create(callback: CallbackQuery, state: FSMContext, bo
         scores = calculate_category_scores(analysis)
         raw_averages = scores.get("raw_averages", {})
         
-        # Сортируем метрики по gap (10 - score)
-        sorted_metrics = sorted(
-            raw_averages.items(),
-            key=lambda x: 10 - x[1],
-            reverse=True,
-        )
-        focus_skills = [m[0] for m in sorted_metrics[:3]]
+        # Три метрики с наибольшим gap (10 - score) — частичный отбор без полной сортировки
+        weakest = heapq.nsmallest(3, raw_averages.items(), key=lambda x: x[1])
+        focus_skills = [m[0] for m in weakest]
         
         if not focus_skills:
             focus_skills = ["depth", "systems_thinking", "creativity"]
@@ -785,9 +787,6 @@ async def save_note(message: Message, state: FSMContext):
         return
     
     async with get_session() as db:
-        from sqlalchemy import update
-        from src.db.models import PdpTask
-        
         stmt = (
             update(PdpTask)
             .where(PdpTask.id == task_id)
@@ -822,8 +821,7 @@ async def show_stats(callback: CallbackQuery):
         
         # Прогресс-бар
         progress = stats['completion_rate']
-        bar_filled = int(progress / 10)
-        bar = "█" * bar_filled + "░" * (10 - bar_filled)
+        bar = PROGRESS_BARS[min(max(int(progress / 10), 0), 10)]
         
         text = f"""📈 <b>МОЙ ПРОГРЕСС</b>
 
@@ -1010,8 +1008,7 @@ async def show_weekly_summary(callback: CallbackQuery):
                 skills_progress[task.skill_name]["done"] += 1
         
         # Прогресс-бар
-        bar_filled = int(completion_rate / 10)
-        bar = "█" * bar_filled + "░" * (10 - bar_filled)
+        bar = PROGRESS_BARS[min(max(int(completion_rate / 10), 0), 10)]
         
         text = f"""📊 <b>ИТОГИ НЕДЕЛИ {week_num}</b>
 
@@ -1106,9 +1103,6 @@ async def handle_reflection_difficulty(callback: CallbackQuery, state: FSMContex
     async with get_session() as db:
         if difficulty == "hard":
             # Reduce duration for next week tasks
-            from sqlalchemy import update
-            from src.db.models import PdpTask
-            
             stmt = (
                 update(PdpTask)
                 .where(PdpTask.plan_id == plan_id)
@@ -1150,8 +1144,6 @@ async def save_reflection(message: Message, state: FSMContext):
     
     # Сохраняем рефлексию в БД
     async with get_session() as db:
-        from src.db.repositories.pdp_repo import update_pdp_reflection
-        
         # Сохраняем данные
         reflection_data = {
             "difficulty": difficulty,
@@ -1202,8 +1194,6 @@ async def complete_plan_callback(callback: CallbackQuery):
     plan_id = int(callback.data.split(":")[2])
     
     async with get_session() as db:
-        from src.db.repositories.pdp_repo import complete_pdp_plan
-        
         stats = await get_pdp_stats(db, plan_id)
         plan = await get_active_pdp_plan(db, (await get_user_by_telegram_id(db, callback.from_user.id)).id)
         
@@ -1270,8 +1260,6 @@ async def compare_with_diagnostic(callback: CallbackQuery):
             return
         
         # Получаем сессию диагностики, на которой основан план
-        from src.db.repositories.diagnostic_repo import get_session_by_id, get_completed_sessions
-        
         old_session = await get_session_by_id(db, plan.session_id)
         
         # Получаем последнюю диагностику (если есть новая)
@@ -1353,9 +1341,7 @@ async def compare_with_diagnostic(callback: CallbackQuery):
             new_val = new_avgs.get(skill, 5)
             skill_delta = new_val - old_val
             
-            skill_name = TASK_TYPES.get(skill, skill)  # Fallback
-            from src.ai.answer_analyzer import METRIC_NAMES_RU
-            skill_name = METRIC_NAMES_RU.get(skill, skill)
+            skill_name = get_metric_name_ru(skill)
             
             if skill_delta > 0.5:
                 improvements.append(f"🟢 {skill_name}: +{skill_delta:.1f}")
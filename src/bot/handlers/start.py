@@ -3,11 +3,13 @@
 """
 
 import logging
+import time
 from datetime import datetime, timedelta
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart, Command
 from aiogram.fsm.context import FSMContext
+from sqlalchemy import update
 
 from src.bot.states import DiagnosticStates
 from src.bot.keyboards.reply import (
@@ -32,16 +34,20 @@ from src.bot.keyboards.inline import (
 from src.bot.handlers.history import cmd_profile, cmd_history
 from src.bot.handlers.pdp import cmd_pdp
 from src.bot.handlers.payments import cmd_balance
+from src.bot.handlers.diagnostic import reset_answer_stats, discard_answer_stats
 
 from src.db import get_session
+from src.db.models import DiagnosticSession
 from src.db.repositories import (
     get_or_create_user,
     get_active_session,
+    get_session_by_id,
     get_user_sessions,
     get_user_stats,
 )
 from src.db.repositories.reminder_repo import cancel_all_user_reminders
 from src.db.repositories import balance_repo
+from src.ai.question_gen import generate_question
 
 router = Router(name="start")
 logger = logging.getLogger(__name__)
@@ -127,6 +133,7 @@ async def cmd_start(message: Message, state: FSMContext):
     """Обработка команды /start."""
     # Сбрасываем состояние
     await state.clear()
+    discard_answer_stats(message.from_user.id)
 
     db_user_id = None
     active_session = None
@@ -239,6 +246,8 @@ async def btn_new_diagnostic(message: Message, state: FSMContext, user=None):
     
     # Определяем пользователя (если вызов из колбэка, message.from_user может быть ботом)
     target_user = user or message.from_user
+    if target_user:
+        discard_answer_stats(target_user.id)
     first_name = target_user.first_name if target_user else "друг"
 
     # Отменяем все старые напоминания
@@ -702,6 +711,7 @@ async def process_restart(callback: CallbackQuery, state: FSMContext):
     db_user_id = data.get("db_user_id")
 
     await state.clear()
+    discard_answer_stats(callback.from_user.id)
 
     # Восстанавливаем db_user_id
     if db_user_id:
@@ -726,10 +736,7 @@ async def continue_session(callback: CallbackQuery, state: FSMContext):
     except Exception:
         pass
 
-    from src.db.repositories import get_session_by_id
-    import time
-
-    session_id = int(callback.data.split(":")[1])
+    session_id = int(callback.data.rpartition(":")[2])
 
     try:
         async with get_session() as db:
@@ -752,11 +759,12 @@ async def continue_session(callback: CallbackQuery, state: FSMContext):
                 experience=db_session.experience,
                 experience_name=db_session.experience_name,
                 current_question=current_question,
-                conversation_history=conversation_history,
-                analysis_history=analysis_history,
-                answer_stats=[],  # Начинаем статистику заново
+                # История остаётся в БД — confirm_answer читает её оттуда
+                max_answer_length=0,
+                deep_streak=0,
                 question_start_time=time.time(),
             )
+            reset_answer_stats(callback.from_user.id)  # Начинаем статистику заново
 
             # Получаем последний вопрос из истории или генерируем новый
             if (
@@ -764,8 +772,6 @@ async def continue_session(callback: CallbackQuery, state: FSMContext):
                 and len(conversation_history) >= current_question - 1
             ):
                 # Если есть история — генерируем следующий вопрос
-                from src.ai.question_gen import generate_question
-
                 await callback.message.edit_text("🔄 Восстанавливаю сессию...")
 
                 question = await generate_question(
@@ -786,8 +792,6 @@ async def continue_session(callback: CallbackQuery, state: FSMContext):
                 )
             else:
                 # Нет истории — генерируем первый вопрос
-                from src.ai.question_gen import generate_question
-
                 await callback.message.edit_text("🔄 Восстанавливаю сессию...")
 
                 question = await generate_question(
@@ -833,10 +837,6 @@ async def restart_fresh(callback: CallbackQuery, state: FSMContext):
     except Exception:
         pass
 
-    from src.db.repositories import get_active_session
-    from sqlalchemy import update
-    from src.db.models import DiagnosticSession
-
     data = await state.get_data()
     db_user_id = data.get("db_user_id")
 
@@ -858,6 +858,7 @@ async def restart_fresh(callback: CallbackQuery, state: FSMContext):
             logger.error(f"Failed to abandon session: {e}")
 
     await state.clear()
+    discard_answer_stats(callback.from_user.id)
 
     if db_user_id:
         await state.update_data(db_user_id=db_user_id)
@@ -883,6 +884,7 @@ MAIN_MENU_TEXT = """
 async def back_to_main_menu(callback: CallbackQuery, state: FSMContext):
     """Возврат в главное меню."""
     await state.clear()
+    discard_answer_stats(callback.from_user.id)
 
     # Восстанавливаем db_user_id если есть
     try:
@@ -928,8 +930,6 @@ async def cmd_cancel(message: Message, state: FSMContext):
     # Помечаем сессию как abandoned
     if db_session_id:
         try:
-            from sqlalchemy import update
-            from src.db.models import DiagnosticSession
 
             async with get_session() as db:
                 stmt = (
@@ -947,6 +947,7 @@ async def cmd_cancel(message: Message, state: FSMContext):
 
     # Очищаем state
     await state.clear()
+    discard_answer_stats(message.from_user.id)
 
     await message.answer(
         f"❌ <b>Диагностика отменена</b>\n\n"
@@ -2,15 +2,19 @@
 Обработчик голосовых сообщений с улучшенным UX.
 """
 import logging
+import re
 import tempfile
 import os
 import asyncio
 
 from aiogram import Router, Bot, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
+from aiogram.enums import ChatAction
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from src.bot.states import DiagnosticStates
+from src.bot.handlers.diagnostic import fire_cancel_reminder, get_typing_hint, confirm_answer, safe_send_chat_action
 from src.bot.keyboards.inline import get_pause_keyboard
 from src.core.config import get_settings
 
@@ -21,6 +25,27 @@ logger = logging.getLogger(__name__)
 MIN_VOICE_DURATION = 3
 # Рекомендуемая длительность для хорошего ответа
 RECOMMENDED_VOICE_DURATION = 15
+# Как часто обновлять «печатает...» во время расшифровки (Telegram держит его ~5 сек)
+CHAT_ACTION_INTERVAL = 4
+
+# Слова-паразиты и хезитации
+# \b - граница слова, (?:...) - группировка без захвата
+HESITATIONS = (
+    r"\b(э+)\b",
+    r"\b(м+)\b",
+    r"\b(а+)\b",
+    r"\b(ну+)\b",
+    r"\b(типа)\b",
+    r"\b(короче)\b",
+    r"\b(как\s+бы)\b",
+    r"\b(в\s+общем)\b",
+    r"\b(значит)\b",
+    r"\b(собственно)\b",
+)
+# Регулярки компилируем один раз при импорте, а не на каждое голосовое
+_HESITATION_RE = re.compile("|".join(HESITATIONS), re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([.,!?;])")
 
 
 def clean_voice_text(text: str) -> str:
@@ -33,37 +58,18 @@ def clean_voice_text(text: str) -> str:
     Returns:
         Очищенный текст
     """
-    import re
-    
     if not text:
         return ""
         
-    # 1. Удаляем явные хезитации (эээ, ммм)
-    # \b - граница слова, (?:...) - группировка без захвата
-    # re.I - игнорировать регистр
-    hesitations = [
-        r"\b(э+)\b",
-        r"\b(м+)\b",
-        r"\b(а+)\b",
-        r"\b(ну+)\b",
-        r"\b(типа)\b",
-        r"\b(короче)\b",
-        r"\b(как\s+бы)\b",
-        r"\b(в\s+общем)\b",
-        r"\b(значит)\b",
-        r"\b(собственно)\b",
-    ]
-    
-    cleaned = text
-    for pattern in hesitations:
-        # Заменяем на пробел, чтобы не склеить слова
-        cleaned = re.sub(pattern, " ", cleaned, flags=re.IGNORECASE)
+    # 1. Удаляем явные хезитации (эээ, ммм) — одним проходом
+    # Заменяем на пробел, чтобы не склеить слова
+    cleaned = _HESITATION_RE.sub(" ", text)
         
     # 2. Удаляем множественные пробелы и переносы
-    cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    cleaned = _WHITESPACE_RE.sub(" ", cleaned).strip()
     
     # 3. Исправляем пунктуацию (пробел перед точкой/запятой)
-    cleaned = re.sub(r"\s+([.,!?;])", r"\1", cleaned)
+    cleaned = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", cleaned)
     
     # 4. Capitalize first letter
     if cleaned:
@@ -159,9 +165,6 @@ def get_voice_quality_hint(duration: int, text_length: int | None) -> str | None
 
 def get_voice_keyboard():
     """Клавиатура для подтверждения голосового (с опцией редактирования)."""
-    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
-    
     builder = InlineKeyboardBuilder()
     builder.row(
         InlineKeyboardButton(text="✅ Отправить", callback_data="confirm_voice"),
@@ -174,16 +177,17 @@ def get_voice_keyboard():
     return builder.as_markup()
 
 
+# Клавиатура статичная — собираем один раз
+VOICE_KEYBOARD = get_voice_keyboard()
+
+
 @router.message(DiagnosticStates.answering, F.voice)
 async def process_voice_answer(message: Message, state: FSMContext, bot: Bot):
     """Обработка голосового сообщения как ответа."""
-    from src.bot.handlers.diagnostic import cancel_reminder, get_typing_hint
-    
     # Отменяем таймер напоминания
     data = await state.get_data()
     db_session_id = data.get("db_session_id")
-    if db_session_id:
-        await cancel_reminder(db_session_id)
+    fire_cancel_reminder(db_session_id)
     
     duration = message.voice.duration or 0
     
@@ -195,49 +199,33 @@ async def process_voice_answer(message: Message, state: FSMContext, bot: Bot):
         )
         return
     
-    # Показываем прогресс расшифровки
-    progress_msg = await message.answer(
-        "🎤 <b>Расшифровываю голосовое...</b>\n\n"
-        f"<code>▓░░░░░░░░░</code> Получаю файл..."
-    )
+    # Показываем статичный статус расшифровки (без таймерных edit'ов — лимиты Telegram)
+    progress_msg = await message.answer("🎤 <b>Расшифровываю голосовое...</b>")
     
     try:
-        # Анимация прогресса
+        # Пока ждём — держим «печатает...» (chat action дешевле edit'а)
         async def update_progress():
-            stages = [
-                ("▓▓▓░░░░░░░", "Загружаю аудио..."),
-                ("▓▓▓▓▓░░░░░", "Распознаю речь..."),
-                ("▓▓▓▓▓▓▓░░░", "Обрабатываю текст..."),
-            ]
-            for bar, status in stages:
-                await asyncio.sleep(1.5)
-                try:
-                    await progress_msg.edit_text(
-                        f"🎤 <b>Расшифровываю голосовое...</b>\n\n"
-                        f"<code>{bar}</code> {status}"
-                    )
-                except Exception:
-                    pass
+            while True:
+                await safe_send_chat_action(bot, message.chat.id, ChatAction.TYPING)
+                await asyncio.sleep(CHAT_ACTION_INTERVAL)
         
         progress_task = asyncio.create_task(update_progress())
+        try:
+            # Транскрибируем
+            text = await transcribe_voice(bot, message.voice.file_id)
+        finally:
+            # Останавливаем «печатает...» даже если расшифровка упала
+            progress_task.cancel()
         
-        # Транскрибируем
-        text = await transcribe_voice(bot, message.voice.file_id)
-        
-        # Очищаем текст (Q1 1.3: Audio Cleaning)
+        # Очищаем текст (Q1 1.3: Audio Cleaning) — на выходе уже без крайних пробелов
         if text:
             text = clean_voice_text(text)
-        
-        # Останавливаем анимацию
-        progress_task.cancel()
-        try:
-            await progress_task
-        except asyncio.CancelledError:
-            pass
+        # Длину считаем один раз: она нужна для проверки, подсказок и превью
+        text_len = len(text) if text else 0
         
         # Проверяем результат
-        if not text or len(text.strip()) < 10:
-            hint = get_voice_quality_hint(duration, len(text) if text else 0)
+        if text_len < 10:
+            hint = get_voice_quality_hint(duration, text_len)
             await progress_msg.edit_text(
                 "❌ <b>Не удалось распознать голосовое</b>\n\n"
                 f"{hint or ''}\n\n"
@@ -248,9 +236,8 @@ async def process_voice_answer(message: Message, state: FSMContext, bot: Bot):
             )
             return
         
-        # Получаем подсказку по качеству
-        quality_hint = get_voice_quality_hint(duration, len(text))
-        typing_hint = get_typing_hint(len(text))
+        # Получаем подсказку по качеству (подсказка по длине — только если её нет)
+        hint = get_voice_quality_hint(duration, text_len) or get_typing_hint(text_len)
         
         # Сохраняем распознанный текст как черновик
         await state.update_data(
@@ -259,14 +246,14 @@ async def process_voice_answer(message: Message, state: FSMContext, bot: Bot):
         )
         
         # Показываем preview с кнопками
-        preview_text = text[:400] + "..." if len(text) > 400 else text
+        preview_text = (text[:400] + "...") if text_len > 400 else text
         
         await progress_msg.edit_text(
             f"🎤 <b>Вот что я услышал:</b>\n\n"
             f"<i>«{preview_text}»</i>\n\n"
-            f"{quality_hint or typing_hint}\n\n"
+            f"{hint}\n\n"
             f"Всё правильно?",
-            reply_markup=get_voice_keyboard(),
+            reply_markup=VOICE_KEYBOARD,
         )
         
         await state.set_state(DiagnosticStates.confirming_answer)
@@ -285,8 +272,6 @@ async def process_voice_answer(message: Message, state: FSMContext, bot: Bot):
 async def confirm_voice_answer(callback: CallbackQuery, state: FSMContext, bot: Bot):
     """Подтверждение голосового ответа — передаём в основной обработчик."""
     # Валидация будет внутри confirm_answer
-    from src.bot.handlers.diagnostic import confirm_answer
-    
     # Передаём в основной обработчик подтверждения
     # Меняем callback_data чтобы основной handler его обработал
     callback.data = "confirm_answer"
@@ -2,6 +2,7 @@
 MAX Diagnostic Bot — точка входа.
 """
 import asyncio
+import json
 import logging
 import sys
 
@@ -20,6 +21,26 @@ from src.bot.middlewares.logging_middleware import LoggingMiddleware
 from src.bot.scheduler import start_scheduler, stop_scheduler
 from src.db import init_db, close_db
 
+try:
+    import orjson
+except ImportError:  # orjson опционален — fallback на stdlib json
+    orjson = None
+
+
+def fsm_json_dumps(data: dict) -> bytes | str:
+    """Сериализация FSM-данных для Redis (orjson, если установлен)."""
+    if orjson is None:
+        return json.dumps(data)
+    # OPT_NON_STR_KEYS — как stdlib json, приводим int-ключи к строкам
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def fsm_json_loads(value: str | bytes) -> dict:
+    """Десериализация FSM-данных из Redis (orjson, если установлен)."""
+    if orjson is None:
+        return json.loads(value)
+    return orjson.loads(value)
+
 
 async def send_admin_alert(bot, message: str):
     """Отправить алерт админу."""
@@ -88,7 +109,11 @@ async def main():
     
     # Диспетчер с хранилищем состояний
     try:
-        storage = RedisStorage.from_url(config.redis_url)
+        storage = RedisStorage.from_url(
+            config.redis_url,
+            json_loads=fsm_json_loads,
+            json_dumps=fsm_json_dumps,
+        )
         # Проверка соединения с Redis
         logger.info("Checking Redis connection...")
         await storage.redis.ping()
@@ -125,8 +150,11 @@ async def main():
     logger.info("⏰ Планировщик напоминаний запущен")
     
     try:
-        # Алерт о запуске (не блокируем основной поток)
-        asyncio.create_task(send_admin_alert(bot, "✅ Бот успешно запущен на сервере!"))
+        # Алерт о запуске (не блокируем основной поток; при останове его дождётся
+        # shutdown_background_tasks)
+        diagnostic.track_background_task(
+            asyncio.create_task(send_admin_alert(bot, "✅ Бот успешно запущен на сервере!"))
+        )
 
         # Запуск polling с авто-реконнектом при сетевых ошибках
         retry_delay = 5
@@ -157,6 +185,8 @@ async def main():
         raise
     finally:
         stop_scheduler()
+        # Фоновые записи ответов дописываем до закрытия пула БД
+        await diagnostic.shutdown_background_tasks()
         await close_db()
         await bot.session.close()
         logger.info("🛑 Бот остановлен")
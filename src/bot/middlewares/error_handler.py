@@ -8,6 +8,8 @@ from aiogram import BaseMiddleware
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Update, Message, CallbackQuery
 
+from src.bot.keyboards.inline import get_back_to_menu_keyboard
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,9 +54,6 @@ class ErrorHandlerMiddleware(BaseMiddleware):
                     
                     # Если есть сообщение, обновляем его
                     if event.message:
-                        # Импорт внутри метода, чтобы избежать циклических импортов
-                        from src.bot.keyboards.inline import get_back_to_menu_keyboard
-                        
                         error_text = (
                             "<b>😔 Ой, что-то пошло не так...</b>\n\n"
                             "Мы уже знаем об ошибке и чиним её.\n"
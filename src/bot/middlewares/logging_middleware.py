@@ -20,7 +20,7 @@ class LoggingMiddleware(BaseMiddleware):
         event: Update,
         data: Dict[str, Any],
     ) -> Any:
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Логируем входящее событие
         user_info = self._get_user_info(event)
@@ -31,12 +31,12 @@ class LoggingMiddleware(BaseMiddleware):
         try:
             result = await handler(event, data)
             
-            duration = (time.time() - start_time) * 1000
+            duration = (time.perf_counter() - start_time) * 1000
             logger.info(f"✅ {event_type} handled in {duration:.0f}ms")
             
             return result
         except Exception as e:
-            duration = (time.time() - start_time) * 1000
+            duration = (time.perf_counter() - start_time) * 1000
             logger.error(f"❌ {event_type} failed after {duration:.0f}ms: {e}")
             raise
     
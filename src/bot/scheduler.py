@@ -15,8 +15,10 @@ from aiogram import Bot
 from aiogram.exceptions import TelegramForbiddenError
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from sqlalchemy import update
 
-from src.db import get_session
+from src.db import get_session, PdpTask
+from src.db.repositories import pdp_repo
 from src.db.repositories.reminder_repo import (
     get_pending_reminders_with_users,
     mark_reminder_sent,
@@ -24,7 +26,7 @@ from src.db.repositories.reminder_repo import (
     get_pending_task_reminders,
     mark_task_reminder_sent,
 )
-from src.db.models import DiagnosticSession
+from src.db.repositories.diagnostic_repo import get_sessions_progress
 
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -115,6 +117,14 @@ async def send_diagnostic_reminders(bot: Bot) -> int:
 
             logger.info(f"Processing {len(reminders_data)} pending reminders")
 
+            # Статусы сессий для stuck-напоминаний — одним запросом на всю пачку
+            stuck_session_ids = [
+                reminder.session_id
+                for reminder, _ in reminders_data
+                if reminder.reminder_type.startswith("stuck_") and reminder.session_id
+            ]
+            sessions_progress = await get_sessions_progress(db, stuck_session_ids)
+
             for reminder, telegram_id in reminders_data:
                 try:
                     if not telegram_id:
@@ -125,15 +135,11 @@ async def send_diagnostic_reminders(bot: Bot) -> int:
                     # === STUCK REMINDERS ===
                     if reminder.reminder_type.startswith("stuck_"):
                         # Проверяем статус сессии
-                        from sqlalchemy import select
-
-                        session_stmt = select(DiagnosticSession).where(
-                            DiagnosticSession.id == reminder.session_id
+                        status, current_question = sessions_progress.get(
+                            reminder.session_id, (None, 0)
                         )
-                        session_res = await db.execute(session_stmt)
-                        diag_session = session_res.scalar_one_or_none()
 
-                        if not diag_session or diag_session.status != "in_progress":
+                        if status != "in_progress":
                             # Сессия уже завершена или не найдена — отменяем напоминание
                             await mark_reminder_sent(db, reminder.id)
                             continue
@@ -143,7 +149,7 @@ async def send_diagnostic_reminders(bot: Bot) -> int:
                             chat_id=telegram_id,
                             text=(
                                 f"⏰ <b>Напоминание</b>\n\n"
-                                f"Ты на вопросе {diag_session.current_question}/10.\n"
+                                f"Ты на вопросе {current_question}/10.\n"
                                 f"Можешь продолжить, когда будешь готов!\n\n"
                                 f"<i>Если нужно время подумать — это нормально 😊</i>"
                             ),
@@ -250,9 +256,6 @@ async def send_daily_pdp_tasks(bot: Bot) -> int:
     """
     Рассылка ежедневных заданий PDP.
     """
-    from src.db.repositories import pdp_repo
-    from src.db import get_session
-
     sent_count = 0
 
     try:
@@ -321,9 +324,6 @@ async def send_daily_pdp_tasks(bot: Bot) -> int:
 
                     # Обновляем статус на sent (чтобы не слать повторно)
                     # Используем execute напрямую, так как в репозитории нет update_status
-                    from sqlalchemy import update
-                    from src.db.models import PdpTask
-
                     await session.execute(
                         update(PdpTask)
                         .where(PdpTask.id == task.id)
@@ -150,19 +150,21 @@ PROJECT_QUESTIONS = [
 ]
 
 
+# Наборы по ролям (product — по умолчанию для неизвестной роли)
+_QUESTIONS_BY_ROLE = {
+    "designer": DESIGNER_QUESTIONS,
+    "project": PROJECT_QUESTIONS,
+}
+_ICEBREAKERS_BY_ROLE = {
+    "designer": DESIGNER_ICEBREAKERS,
+    "project": PROJECT_ICEBREAKERS,
+}
+
+
 def get_questions(role: str) -> list[str]:
     """Получить список вопросов для роли."""
-    if role == "designer":
-        return DESIGNER_QUESTIONS
-    if role == "project":
-        return PROJECT_QUESTIONS
-    return PRODUCT_QUESTIONS
+    return _QUESTIONS_BY_ROLE.get(role, PRODUCT_QUESTIONS)
 
 def get_random_icebreaker(role: str) -> str:
     """Получить случайный вопрос для начала интервью."""
-    if role == "designer":
-        return random.choice(DESIGNER_ICEBREAKERS)
-    if role == "project":
-        return random.choice(PROJECT_ICEBREAKERS)
-    return random.choice(PRODUCT_ICEBREAKERS)
-
+    return random.choice(_ICEBREAKERS_BY_ROLE.get(role, PRODUCT_ICEBREAKERS))
@@ -203,6 +203,38 @@ Time-to-Market -30%, NPS +15. Ошибка: недооценил сопроти
 }"""
 
 
+# Сколько последних вопросов передаём в промпт целиком (плюс 1-й — знакомство)
+QUESTION_PROMPT_KEEP_LAST = 3
+
+
+def _summarize_hidden_turns(analyses: list[dict]) -> str:
+    """
+    Свернуть анализы скрытых вопросов в короткую сводку для промпта.
+    
+    Вместо полного текста Q/A передаём средние по самым слабым метрикам
+    и несколько уникальных пробелов — этого хватает, чтобы копать дальше.
+    """
+    totals: dict[str, float] = {}
+    counts: dict[str, int] = {}
+    gaps: list[str] = []
+    for analysis in analyses:
+        for metric, value in analysis.get("scores", {}).items():
+            if isinstance(value, (int, float)):
+                totals[metric] = totals.get(metric, 0) + value
+                counts[metric] = counts.get(metric, 0) + 1
+        for gap in analysis.get("gaps", []):
+            if gap not in gaps:
+                gaps.append(gap)
+    
+    lines = []
+    if totals:
+        averages = sorted((totals[m] / counts[m], m) for m in totals)
+        lines.append("СЛАБЫЕ МЕТРИКИ: " + ", ".join(f"{m} {avg:.1f}" for avg, m in averages[:3]))
+    if gaps:
+        lines.append("ПРОБЕЛЫ: " + ", ".join(gaps[:3]))
+    return "\n".join(lines)
+
+
 def get_question_prompt(
     role: str,
     role_name: str,
@@ -242,15 +274,19 @@ def get_question_prompt(
                     normalized_history.append({'question': q, 'answer': a})
 
     total_items = len(normalized_history)
-    KEEP_LAST = 5  # Сколько последних вопросов сохранять
+    KEEP_LAST = QUESTION_PROMPT_KEEP_LAST
+    hidden_end = total_items - KEEP_LAST  # Последний скрытый номер вопроса
     
     for i, item in enumerate(normalized_history, 1):
         # Context Window Management:
-        # Если история длинная (> 7 вопросов), оставляем 1-й (знакомство) и последние 5.
-        # Середину сворачиваем.
-        if total_items > (KEEP_LAST + 2) and i > 1 and i <= (total_items - KEEP_LAST):
-            if i == 2: # Добавляем маркер один раз в начале пропуска
-                 history_text += "\n\n[... Предыдущие вопросы скрыты для экономии контекста ...]"
+        # Если история длинная (> 4 вопросов), оставляем 1-й (знакомство) и последние 3.
+        # Середину сворачиваем в компактную сводку по анализам.
+        if total_items > (KEEP_LAST + 1) and i > 1 and i <= hidden_end:
+            if i == 2: # Добавляем сводку один раз в начале пропуска
+                history_text += f"\n\n[... Вопросы 2–{hidden_end} свёрнуты для экономии контекста ...]"
+                summary = _summarize_hidden_turns(analysis_history[1:hidden_end])
+                if summary:
+                    history_text += f"\n{summary}"
             continue
 
         history_text += f"\n\nВОПРОС {i}: {item.get('question', '')}\nОТВЕТ: {item.get('answer', '')}"
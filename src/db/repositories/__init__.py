@@ -4,6 +4,8 @@ from src.db.repositories.diagnostic_repo import (
     create_session,
     get_session_by_id,
     get_active_session,
+    get_session_histories,
+    get_sessions_progress,
     update_session_progress,
     complete_session,
     save_answer,
@@ -22,6 +24,8 @@ __all__ = [
     "create_session",
     "get_session_by_id",
     "get_active_session",
+    "get_session_histories",
+    "get_sessions_progress",
     "update_session_progress",
     "complete_session",
     "save_answer",
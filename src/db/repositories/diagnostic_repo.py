@@ -2,7 +2,7 @@
 Репозиторий для работы с диагностическими сессиями.
 """
 from datetime import datetime
-from sqlalchemy import select, update
+from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -66,6 +66,47 @@ async def get_active_session(
     return result.scalar_one_or_none()
 
 
+async def get_session_histories(
+    session: AsyncSession,
+    session_id: int,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Получить историю диалога и анализа сессии (conversation, analysis).
+
+    Читает только два JSON-поля, без загрузки всей сессии.
+    """
+    stmt = select(
+        DiagnosticSession.conversation_history,
+        DiagnosticSession.analysis_history,
+    ).where(DiagnosticSession.id == session_id)
+    result = await session.execute(stmt)
+    row = result.one_or_none()
+    if row is None:
+        return [], []
+    return list(row[0] or []), list(row[1] or [])
+
+
+async def get_sessions_progress(
+    session: AsyncSession,
+    session_ids: list[int],
+) -> dict[int, tuple[str, int]]:
+    """
+    Получить статус и текущий вопрос для набора сессий одним запросом.
+
+    Возвращает {session_id: (status, current_question)}; тяжёлые JSON-поля
+    (история, отчёт) не загружаются.
+    """
+    if not session_ids:
+        return {}
+    stmt = select(
+        DiagnosticSession.id,
+        DiagnosticSession.status,
+        DiagnosticSession.current_question,
+    ).where(DiagnosticSession.id.in_(session_ids))
+    result = await session.execute(stmt)
+    return {row.id: (row.status, row.current_question) for row in result}
+
+
 async def update_session_progress(
     session: AsyncSession,
     session_id: int,
@@ -128,10 +169,24 @@ async def save_answer(
     answer_text: str,
     analysis: dict | None = None,
     commit: bool = True,
+    replace: bool = False,
 ) -> Answer:
-    """Сохранить ответ на вопрос."""
+    """
+    Сохранить ответ на вопрос.
+
+    replace=True — сначала удалить уже сохранённый ответ на этот вопрос
+    (повтор шага после ошибки не должен плодить дубли).
+    """
     scores = analysis.get("scores", {}) if analysis else {}
     
+    if replace:
+        await session.execute(
+            delete(Answer).where(
+                Answer.session_id == diagnostic_session_id,
+                Answer.question_number == question_number,
+            )
+        )
+    
     answer = Answer(
         session_id=diagnostic_session_id,
         question_number=question_number,
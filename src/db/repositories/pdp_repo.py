@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from src.db.models import PdpPlan, PdpTask, PdpReminder, User
+from src.analytics.pdp_generator import generate_pdp_plan
 
 
 # ==================== PDP PLANS ====================
@@ -55,8 +56,6 @@ async def create_and_fill_pdp_plan(
     learning_style: str = "mixed",
 ) -> PdpPlan:
     """Создать план и наполнить его задачами."""
-    from src.analytics.pdp_generator import generate_pdp_plan
-
     # 1. Создаём план
     plan = await create_pdp_plan(
         session, user_id, session_id, focus_skills, daily_time_minutes, learning_style
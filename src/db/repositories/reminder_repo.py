@@ -142,6 +142,34 @@ async def schedule_stuck_reminder(
     return reminder
 
 
+async def reschedule_stuck_reminder(
+    session: AsyncSession,
+    user_id: int,
+    session_id: int,
+    minutes_delay: int = 5,
+) -> None:
+    """
+    Перенести stuck-напоминание сессии (или создать, если его нет).
+
+    Вместо пары cancel + insert на каждый вопрос двигаем уже
+    существующее активное напоминание одним UPDATE.
+    """
+    scheduled_at = datetime.utcnow() + timedelta(minutes=minutes_delay)
+
+    stmt = (
+        update(DiagnosticReminder)
+        .where(DiagnosticReminder.session_id == session_id)
+        .where(DiagnosticReminder.reminder_type.like("stuck_%"))
+        .where(DiagnosticReminder.sent.is_(False))
+        .where(DiagnosticReminder.cancelled.is_(False))
+        .values(scheduled_at=scheduled_at, reminder_type=f"stuck_{minutes_delay}min")
+    )
+    result = await session.execute(stmt)
+
+    if result.rowcount == 0:
+        await schedule_stuck_reminder(session, user_id, session_id, minutes_delay)
+
+
 async def cancel_stuck_reminders(
     session: AsyncSession,
     session_id: int,
@@ -3,6 +3,7 @@
 Streaming UI — улучшает воспринимаемую скорость.
 """
 import asyncio
+from contextlib import suppress
 from typing import Callable, Optional
 from aiogram import Bot
 from aiogram.types import Message
@@ -80,10 +81,8 @@ class LoadingAnimation:
         self._running = False
         if self._task:
             self._task.cancel()
-            try:
+            with suppress(asyncio.CancelledError):
                 await self._task
-            except asyncio.CancelledError:
-                pass
     
     async def _animate(self):
         """Основной цикл анимации."""
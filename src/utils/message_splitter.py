@@ -27,6 +27,9 @@ MAX_RETRIES = 3  # Максимум попыток отправки
 # HTML теги, поддерживаемые Telegram
 ALLOWED_TAGS = ['b', 'i', 'u', 's', 'code', 'pre', 'a', 'tg-spoiler']
 
+# Конец предложения (точка, восклицательный или вопросительный знак + пробел)
+SENTENCE_END_RE = re.compile(r'[.!?] ')
+
 
 def _find_unclosed_tags(text: str) -> list[str]:
     """
@@ -103,11 +106,13 @@ def _find_split_point(text: str, max_len: int) -> int:
     if last_space > max_len * 0.5:
         return last_space + 1
     
-    # Приоритет 4: Точка, восклицательный или вопросительный знак
-    for punct in ['. ', '! ', '? ']:
-        last_punct = search_text.rfind(punct, 0, max_len)
-        if last_punct > max_len * 0.4:
-            return last_punct + 2
+    # Приоритет 4: Точка, восклицательный или вопросительный знак —
+    # один проход регуляркой по окну после 40%, берём последний конец предложения
+    last_punct = None
+    for last_punct in SENTENCE_END_RE.finditer(search_text, int(max_len * 0.4) + 1):
+        pass
+    if last_punct is not None:
+        return last_punct.end()
     
     # Крайний случай — режем по max_len
     return max_len
@@ -7,6 +7,7 @@
 - Стильный современный дизайн
 - Визуальное сравнение с бенчмарком
 """
+import heapq
 import io
 import logging
 import math
@@ -71,6 +72,33 @@ class Colors:
     GRADIENT_END = colors.HexColor('#3B82F6')
 
 
+# Таблицы по итоговому баллу: (нижний порог, значения...), по убыванию порога
+SCORE_LEVELS = (
+    (80, "Senior / Lead", "[S]"),
+    (60, "Middle+", "[M+]"),
+    (40, "Middle", "[M]"),
+    (0, "Junior / Junior+", "[J]"),
+)
+
+# Перцентиль, когда бенчмарка нет
+FALLBACK_PERCENTILES = (
+    (80, "топ 5%", Colors.EXCELLENT),
+    (70, "топ 15%", Colors.EXCELLENT),
+    (60, "топ 30%", Colors.GOOD),
+    (50, "топ 50%", Colors.GOOD),
+    (40, "лучше 40%", Colors.AVERAGE),
+    (0, "ниже среднего", Colors.LOW),
+)
+
+
+def _lookup_by_score(table: tuple, total: int) -> tuple:
+    """Значения первой строки таблицы, чей порог не выше балла."""
+    for threshold, *values in table:
+        if total >= threshold:
+            return tuple(values)
+    return tuple(table[-1][1:])
+
+
 # ========================================
 # РЕГИСТРАЦИЯ ШРИФТОВ
 # ========================================
@@ -928,18 +956,7 @@ def generate_pdf_report(
     total = scores.get('total', 0)
     
     # Определяем уровень
-    if total >= 80:
-        level = "Senior / Lead"
-        level_emoji = "[S]"
-    elif total >= 60:
-        level = "Middle+"
-        level_emoji = "[M+]"
-    elif total >= 40:
-        level = "Middle"
-        level_emoji = "[M]"
-    else:
-        level = "Junior / Junior+"
-        level_emoji = "[J]"
+    level, level_emoji = _lookup_by_score(SCORE_LEVELS, total)
     
     # ========================================
     # СТРАНИЦА 0: PREMIUM COVER PAGE
@@ -1140,9 +1157,9 @@ def generate_pdf_report(
             "growth_orientation": "Рост",
         }
         
-        sorted_metrics = sorted(raw_averages.items(), key=lambda x: x[1], reverse=True)
-        top_3 = sorted_metrics[:3]
-        bottom_3 = sorted_metrics[-3:]
+        # Частичный отбор вместо полной сортировки (bottom_3 — по убыванию, как раньше)
+        top_3 = heapq.nlargest(3, raw_averages.items(), key=lambda x: x[1])
+        bottom_3 = heapq.nsmallest(3, raw_averages.items(), key=lambda x: x[1])[::-1]
         
         strengths_text = " • ".join([f"<b>{metric_names.get(k, k)}</b> ({v:.1f})" for k, v in top_3])
         gaps_text = " • ".join([f"{metric_names.get(k, k)} ({v:.1f})" for k, v in bottom_3])
@@ -1573,8 +1590,7 @@ def generate_pdf_report(
     
     if raw_averages:
         # Топ-5 сильных метрик
-        sorted_metrics = sorted(raw_averages.items(), key=lambda x: x[1], reverse=True)
-        top_5 = sorted_metrics[:5]
+        top_5 = heapq.nlargest(5, raw_averages.items(), key=lambda x: x[1])
         
         for i, (m_key, m_value) in enumerate(top_5, 1):
             details = metric_details.get(m_key, {})
@@ -1649,7 +1665,7 @@ def generate_pdf_report(
         ))
         
         # Нижние 3 метрики
-        bottom_3 = sorted_metrics[-3:][::-1]  # Reverse для worst first
+        bottom_3 = heapq.nsmallest(3, raw_averages.items(), key=lambda x: x[1])  # Worst first
         
         priority_labels = ["[!] Критично", "[*] Важно", "[-] Желательно"]
         
@@ -2102,24 +2118,7 @@ def generate_pdf_report(
                  percentile_color = Colors.AVERAGE if percentile_val > 20 else Colors.LOW
         else:
             # Fallback (если нет данных бенчмарка)
-            if total >= 80:
-                percentile = "топ 5%"
-                percentile_color = Colors.EXCELLENT
-            elif total >= 70:
-                percentile = "топ 15%"
-                percentile_color = Colors.EXCELLENT
-            elif total >= 60:
-                percentile = "топ 30%"
-                percentile_color = Colors.GOOD
-            elif total >= 50:
-                percentile = "топ 50%"
-                percentile_color = Colors.GOOD
-            elif total >= 40:
-                percentile = "лучше 40%"
-                percentile_color = Colors.AVERAGE
-            else:
-                percentile = "ниже среднего"
-                percentile_color = Colors.LOW
+            percentile, percentile_color = _lookup_by_score(FALLBACK_PERCENTILES, total)
         
         # Карточка с перцентилем
         percentile_card_style = ParagraphStyle(
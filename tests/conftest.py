@@ -35,3 +35,90 @@ async def db_session(db_engine):
     
     async with session_factory() as session:
         yield session
+
+
+@pytest_asyncio.fixture(scope="function")
+async def confirm_answer_env(db_engine):
+    """
+    Question 2 of a full diagnostic, ready for _process_confirmed_answer.
+
+    Question 1 is already in the session history. The handler talks to the test
+    DB and an in-memory FSM; Telegram is mocked, and the first edit of the
+    "analysing" message fails to simulate a hiccup after the answer was persisted.
+    """
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from aiogram.fsm.context import FSMContext
+    from aiogram.fsm.storage.base import StorageKey
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from src.ai.question_gen import clear_question_cache, generate_question
+    from src.bot.handlers import diagnostic
+    from src.db.repositories.user_repo import get_or_create_user
+    from src.db.repositories.diagnostic_repo import (
+        create_session,
+        get_session_histories,
+        save_answer,
+        update_session_progress,
+    )
+
+    session_factory = async_sessionmaker(bind=db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        user = await get_or_create_user(db, 777, "retry_user")
+        db_session = await create_session(db, user.id, "designer", "Дизайнер", "middle", "Middle")
+        await update_session_progress(
+            db,
+            db_session.id,
+            1,
+            [{"question": "Q1", "answer": "A1"}],
+            [{"question": 1, "scores": {"depth": 6}, "feedback": "", "topics": []}],
+        )
+
+    state = FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=1, chat_id=777, user_id=777))
+    await state.set_data({
+        "role": "designer",
+        "role_name": "Дизайнер",
+        "experience": "middle",
+        "current_question": 2,
+        "current_question_text": "Q2",
+        "draft_answer": "A2",
+        "db_user_id": user.id,
+        "db_session_id": db_session.id,
+        "diagnostic_mode": "full",
+        "total_questions": 10,
+    })
+
+    processing_msg = MagicMock()
+    processing_msg.edit_text = AsyncMock(side_effect=[RuntimeError("Telegram hiccup"), None])
+    callback = MagicMock()
+    callback.from_user.id = 777
+    callback.message.chat.id = 777
+    callback.answer = AsyncMock()
+    callback.message.edit_reply_markup = AsyncMock()
+    callback.message.answer = AsyncMock(return_value=processing_msg)
+
+    async def slow_analysis(*args, **kwargs):
+        await asyncio.sleep(0.01)  # Analysis is slower than question generation
+        return {"scores": {"depth": 7}, "feedback": "ok", "topics": []}
+
+    clear_question_cache()
+    # scripts/test_confirm_answer.py replaces module attributes without restoring them,
+    # so the real collaborators are pinned here explicitly
+    with patch.multiple(
+        diagnostic,
+        get_session=session_factory,
+        analyze_answer=slow_analysis,
+        start_reminder=AsyncMock(),
+        generate_question=generate_question,
+        get_session_histories=get_session_histories,
+        save_answer=save_answer,
+        update_session_progress=update_session_progress,
+    ):
+        yield SimpleNamespace(
+            state=state,
+            callback=callback,
+            bot=AsyncMock(),
+            session_id=db_session.id,
+            session_factory=session_factory,
+        )
+    clear_question_cache()
+    diagnostic._answer_stats.pop(777, None)
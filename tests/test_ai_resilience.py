@@ -2,8 +2,9 @@ import pytest
 import json
 from unittest.mock import AsyncMock, patch
 from src.ai.answer_analyzer import analyze_answer, DEFAULT_ANALYSIS
-from src.ai.question_gen import generate_question
+from src.ai.question_gen import generate_question, clear_question_cache
 from src.ai.client import AIServiceError
+from src.bot.handlers.diagnostic import _process_confirmed_answer, flush_pending_writes
 
 # Mock response for analyze_answer
 VALID_ANALYSIS_JSON = json.dumps({
@@ -85,3 +86,44 @@ async def test_generate_question_failure():
         # Should return a fallback question (not empty)
         assert len(question) > 0
         assert "?" in question
+
+@pytest.fixture
+def empty_question_cache():
+    """Start and end with an empty question cache so tests don't leak into each other."""
+    clear_question_cache()
+    yield
+    clear_question_cache()
+
+@pytest.mark.asyncio
+async def test_generate_question_cache_hit(empty_question_cache):
+    """Repeated generation for the same prompt is served from cache."""
+    with patch("src.ai.question_gen.chat_completion", new_callable=AsyncMock) as mock_chat:
+        mock_chat.return_value = "Cached Question?"
+        history = [{"question": "Q1", "answer": "A1"}]
+        
+        for _ in range(2):
+            question = await generate_question(
+                role="designer", role_name="Дизайнер", experience="middle",
+                question_number=2, conversation_history=history, analysis_history=[]
+            )
+        
+        assert question == "Cached Question?"
+        assert mock_chat.await_count == 1
+
+@pytest.mark.asyncio
+async def test_confirm_retry_serves_next_question_from_cache(confirm_answer_env):
+    """Retrying a failed answer step regenerates the same prompt, so the next question is cached."""
+    env = confirm_answer_env
+    with patch("src.ai.question_gen.chat_completion", new_callable=AsyncMock) as mock_chat:
+        mock_chat.return_value = "Q3?"
+
+        # First attempt generates question 3, then fails on the Telegram edit
+        await _process_confirmed_answer(env.callback, env.state, env.bot)
+        assert mock_chat.await_count == 1
+
+        # Retry of the same step
+        await _process_confirmed_answer(env.callback, env.state, env.bot)
+        await flush_pending_writes(env.session_id)
+
+    assert mock_chat.await_count == 1
+    assert (await env.state.get_data())["current_question_text"] == "Q3?"
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import func, select
+from unittest.mock import AsyncMock, patch
+from src.bot.handlers.diagnostic import _process_confirmed_answer, flush_pending_writes
+from src.db.models import Answer
+from src.db.repositories.diagnostic_repo import get_session_histories
+
+
+@pytest.mark.asyncio
+async def test_confirm_retry_does_not_duplicate_history(confirm_answer_env):
+    """A retry after a failure past the persist step rewrites the turn instead of appending it again."""
+    env = confirm_answer_env
+    with patch("src.ai.question_gen.chat_completion", new_callable=AsyncMock) as mock_chat:
+        mock_chat.return_value = "Q3?"
+
+        # First attempt persists the answer, then fails on the Telegram edit
+        await _process_confirmed_answer(env.callback, env.state, env.bot)
+        assert (await env.state.get_data())["current_question"] == 2
+
+        # User presses "confirm" again
+        await _process_confirmed_answer(env.callback, env.state, env.bot)
+        await flush_pending_writes(env.session_id)
+
+    assert (await env.state.get_data())["current_question"] == 3
+    async with env.session_factory() as db:
+        history, analysis_history = await get_session_histories(db, env.session_id)
+        answers = await db.scalar(
+            select(func.count()).select_from(Answer).where(
+                Answer.session_id == env.session_id, Answer.question_number == 2
+            )
+        )
+
+    assert history == [{"question": "Q1", "answer": "A1"}, {"question": "Q2", "answer": "A2"}]
+    assert [a["question"] for a in analysis_history] == [1, 2]
+    assert answers == 1
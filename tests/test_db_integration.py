@@ -1,5 +1,7 @@
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.models import DiagnosticReminder
 from src.db.repositories.user_repo import get_or_create_user, get_user_by_telegram_id
 from src.db.repositories.diagnostic_repo import (
     create_session,
@@ -8,8 +10,11 @@ from src.db.repositories.diagnostic_repo import (
     save_answer,
     complete_session,
     get_session_with_answers,
-    get_active_session
+    get_active_session,
+    get_session_histories,
+    get_sessions_progress,
 )
+from src.db.repositories.reminder_repo import reschedule_stuck_reminder
 
 @pytest.mark.asyncio
 async def test_user_lifecycle(db_session, db_engine):
@@ -123,3 +128,110 @@ async def test_diagnostic_flow(db_session, db_engine):
         assert s.total_score == 85
         assert len(s.answers) == 1
         assert s.answers[0].answer_text == answer_text
+
+@pytest.mark.asyncio
+async def test_create_session_without_commit_has_id(db_session, db_engine):
+    """PK доступен сразу после create_session(commit=False) — refresh не нужен."""
+    user = await get_or_create_user(db_session, 777, "nocommit_user")
+
+    diag_session = await create_session(
+        db_session,
+        user_id=user.id,
+        role="designer",
+        role_name="Designer",
+        experience="middle",
+        experience_name="1-3 года",
+        commit=False,
+    )
+    session_id = diag_session.id
+    assert session_id is not None
+
+    await db_session.commit()
+
+    async with AsyncSession(db_engine) as session2:
+        s = await get_session_by_id(session2, session_id)
+        assert s is not None
+        assert s.status == "in_progress"
+
+@pytest.mark.asyncio
+async def test_reschedule_stuck_reminder_reuses_row(db_session, db_engine):
+    """Повторный reschedule двигает существующее напоминание, а не плодит новые."""
+    user = await get_or_create_user(db_session, 888, "reminder_user")
+    diag_session = await create_session(
+        db_session,
+        user_id=user.id,
+        role="designer",
+        role_name="Designer",
+        experience="middle",
+        experience_name="1-3 года",
+    )
+
+    await reschedule_stuck_reminder(db_session, user.id, diag_session.id, minutes_delay=5)
+    await db_session.commit()
+    await reschedule_stuck_reminder(db_session, user.id, diag_session.id, minutes_delay=5)
+    await db_session.commit()
+
+    async with AsyncSession(db_engine) as session2:
+        result = await session2.execute(
+            select(DiagnosticReminder).where(DiagnosticReminder.session_id == diag_session.id)
+        )
+        reminders = result.scalars().all()
+        assert len(reminders) == 1
+        assert reminders[0].reminder_type == "stuck_5min"
+        assert reminders[0].cancelled is False
+
+@pytest.mark.asyncio
+async def test_get_session_histories(db_session, db_engine):
+    """История сессии читается из БД (FSM её больше не хранит)."""
+    user = await get_or_create_user(db_session, 999, "history_user")
+    diag_session = await create_session(
+        db_session,
+        user_id=user.id,
+        role="designer",
+        role_name="Designer",
+        experience="middle",
+        experience_name="1-3 года",
+    )
+
+    assert await get_session_histories(db_session, diag_session.id) == ([], [])
+
+    turn = {"question": "Q1", "answer": "A1"}
+    turn_analysis = {"question": 1, "scores": {"depth": 7}, "feedback": "", "topics": []}
+    await update_session_progress(db_session, diag_session.id, 1, [turn], [turn_analysis])
+
+    async with AsyncSession(db_engine) as session2:
+        history, analysis_history = await get_session_histories(session2, diag_session.id)
+        assert history == [turn]
+        assert analysis_history == [turn_analysis]
+        assert await get_session_histories(session2, -1) == ([], [])
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_progress(db_session):
+    """Статусы нескольких сессий читаются одним запросом."""
+    user = await get_or_create_user(db_session, 1001, "progress_user")
+    active = await create_session(
+        db_session,
+        user_id=user.id,
+        role="designer",
+        role_name="Designer",
+        experience="middle",
+        experience_name="1-3 года",
+    )
+    finished = await create_session(
+        db_session,
+        user_id=user.id,
+        role="product",
+        role_name="Product",
+        experience="senior",
+        experience_name="3+ года",
+    )
+    await update_session_progress(db_session, active.id, 4, [], [])
+    await complete_session(db_session, finished.id, {"total": 50}, "report", [], [])
+
+    progress = await get_sessions_progress(db_session, [active.id, finished.id, -1])
+    assert progress == {
+        active.id: ("in_progress", 4),
+        finished.id: ("completed", finished.current_question),
+    }
+    assert await get_sessions_progress(db_session, []) == {}
@@ -51,6 +51,13 @@ class TestMessageSplitter:
         max_len = len("Word1 Word2") + 1
         split_point = _find_split_point(text, max_len)
         assert text[:split_point] == "Word1 Word2 " # Includes space? Logic: last_space + 1
+
+    def test_find_split_point_sentence_end(self):
+        # No space past 50% of max_len, sentence end just past 40%
+        text = "Hello you! " + "x" * 30
+        max_len = 20
+        split_point = _find_split_point(text, max_len)
+        assert text[:split_point] == "Hello you! "
         
     def test_split_message_simple(self):
         text = "Short message"